@@ -1,121 +1,407 @@
 """
 Job Store - In-memory job storage with optional file persistence
+
+Persistence is an append-only JSONL log (jobs.log): each flush appends one
+line per changed job instead of rewriting every job. Mutations only queue
+the job id and wake a writer thread, which waits a short debounce so bursts
+of progress updates collapse into one write. close() flushes and compacts
+the log on shutdown.
+
+Startup only indexes the log (job_id -> offset of its latest entry).
+Historical jobs are read from disk on first access and kept in a bounded
+LRU cache; a job is moved into memory only once it is modified again.
+
+Set JOBSTORE_PERSIST=0 to keep jobs in memory only (useful for dev).
 """
 
-import json
+import asyncio
+import logging
 import os
+import re
 import threading
-from typing import Optional, Dict
-from datetime import datetime
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Optional, Dict, List, Mapping, Set, Tuple
+from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
+
 from ..schemas.job_schema import JobData, JobStatus
 
+log = logging.getLogger(__name__)
+
+# Prefix written by _encode_entry; lets startup index lines without parsing them
+_ENTRY_PREFIX_RE = re.compile(rb'\{"op":"(upsert|delete)","job_id":("(?:[^"\\]|\\.)*")')
+
+# Settable JobData fields; a frozenset test is cheaper than hasattr on a model
+_JOB_FIELDS = frozenset(JobData.model_fields.keys())
+
 
 class JobStore:
-    """Thread-safe in-memory job store with file persistence"""
+    """Thread-safe in-memory job store with append-only log persistence"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", debounce: float = 0.5,
+                 persist: Optional[bool] = None,
+                 compact_threshold: int = 8 * 1024 * 1024,
+                 cache_size: int = 256):
+        # Jobs created or modified since startup
         self._jobs: Dict[str, JobData] = {}
-        self._lock = threading.RLock()
+        # Historical jobs on disk: job_id -> offset of its latest log entry
+        self._index: Dict[str, int] = {}
+        self._cache: "OrderedDict[str, JobData]" = OrderedDict()
+        self._cache_size = cache_size
+        # Read-only copy for list_jobs, rebuilt only when jobs are added or removed
+        self._snapshot: Mapping[str, JobData] = MappingProxyType({})
+        self._lock = threading.Lock()
+        # Serializes log writes and compaction; always taken before _lock
+        self._io_lock = threading.Lock()
         self._data_dir = Path(data_dir)
-        self._jobs_file = self._data_dir / "jobs.json"
+        self._jobs_log = self._data_dir / "jobs.log"
+        self._legacy_file = self._data_dir / "jobs.json"
+        self._log = None
         
-        # Ensure data directory exists
-        self._data_dir.mkdir(parents=True, exist_ok=True)
+        if persist is None:
+            persist = os.environ.get("JOBSTORE_PERSIST", "1") != "0"
+        self._persist = persist
+        self._debounce = max(0.05, debounce)
+        self._compact_threshold = compact_threshold
+        self._pending_writes: Set[str] = set()
+        self._write_cv = threading.Condition(self._lock)
+        self._stop_event = threading.Event()
+        self._writer: Optional[threading.Thread] = None
         
-        # Load existing jobs from file (optional, for persistence across restarts)
-        self._load_jobs()
+        if self._persist:
+            # Ensure data directory exists
+            self._data_dir.mkdir(parents=True, exist_ok=True)
+            
+            # Index existing log (optional, for persistence across restarts)
+            self._load_jobs()
+            self._snapshot = MappingProxyType(dict(self._jobs))
+            self._log = open(self._jobs_log, 'ab', buffering=1 << 20)
+    
+    @staticmethod
+    def _parse_job(job_dict: dict) -> JobData:
+        """Build JobData from a persisted dict without re-validating it
+
+        Persisted jobs were validated when created, so only the dates need
+        converting back from ISO strings.
+        """
+        job_dict['created_at'] = datetime.fromisoformat(job_dict['created_at'])
+        job_dict['updated_at'] = datetime.fromisoformat(job_dict['updated_at'])
+        return JobData.model_construct(**job_dict)
     
     def _load_jobs(self):
-        """Load jobs from file if exists"""
+        """Index the job log (or import a legacy jobs.json snapshot) if it exists"""
         try:
-            if self._jobs_file.exists():
-                with open(self._jobs_file, 'r') as f:
-                    data = json.load(f)
-                    for job_id, job_dict in data.items():
-                        # Convert string dates back to datetime
-                        job_dict['created_at'] = datetime.fromisoformat(job_dict['created_at'])
-                        job_dict['updated_at'] = datetime.fromisoformat(job_dict['updated_at'])
-                        self._jobs[job_id] = JobData(**job_dict)
+            if self._jobs_log.exists():
+                offset = 0
+                with open(self._jobs_log, 'rb') as f:
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            # Torn final line from an interrupted flush
+                            break
+                        if line.strip():
+                            self._index_entry(line, offset)
+                        offset += len(line)
+                if offset < self._jobs_log.stat().st_size:
+                    # Cut the torn tail so the next append starts on a fresh line
+                    # instead of being merged into it
+                    log.warning("Truncating torn entry at end of %s (offset %d)",
+                                self._jobs_log, offset)
+                    os.truncate(self._jobs_log, offset)
+            elif self._legacy_file.exists():
+                with open(self._legacy_file, 'rb') as f:
+                    for job_id, job_dict in orjson.loads(f.read()).items():
+                        self._jobs[job_id] = self._parse_job(job_dict)
+                self._pending_writes.update(self._jobs)
         except Exception as e:
-            print(f"Warning: Could not load jobs from file: {e}")
+            log.warning("Could not load jobs from file: %s", e)
     
-    def _save_jobs(self):
-        """Save jobs to file"""
+    def _index_entry(self, line: bytes, offset: int):
+        """Apply one log line to the index; a corrupt line is skipped, not fatal"""
         try:
-            data = {}
-            for job_id, job in self._jobs.items():
-                job_dict = job.model_dump()
-                # Convert datetime to ISO string
-                job_dict['created_at'] = job.created_at.isoformat()
-                job_dict['updated_at'] = job.updated_at.isoformat()
-                data[job_id] = job_dict
-            
-            with open(self._jobs_file, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            op, job_id = self._scan_entry(line)
+        except Exception as e:
+            log.warning("Skipping corrupt job log entry at offset %d: %s", offset, e)
+            return
+        if op == 'delete':
+            self._index.pop(job_id, None)
+        else:
+            self._index[job_id] = offset
+    
+    @staticmethod
+    def _scan_entry(line: bytes) -> Tuple[str, str]:
+        """Return (op, job_id) of a log line without decoding its fields"""
+        match = _ENTRY_PREFIX_RE.match(line)
+        if match:
+            return match.group(1).decode(), orjson.loads(match.group(2))
+        entry = orjson.loads(line)
+        return entry['op'], entry['job_id']
+    
+    def _read_job(self, job_id: str, offset: int) -> Optional[JobData]:
+        """Read one job entry from the log (caller holds the I/O lock)
+
+        Returns None if the line at offset is not an upsert of job_id.
+        """
+        with open(self._jobs_log, 'rb') as f:
+            f.seek(offset)
+            entry = orjson.loads(f.readline())
+        if entry.get('op') != 'upsert' or entry.get('job_id') != job_id:
+            log.warning("Job log entry at offset %d is not job %s", offset, job_id)
+            return None
+        return self._parse_job(entry['fields'])
+    
+    @staticmethod
+    def _encode_entry(job_id: str, job: Optional[JobData]) -> bytes:
+        """Encode one log line: an upsert of the full job, or a delete"""
+        if job is None:
+            return orjson.dumps({'op': 'delete', 'job_id': job_id},
+                                option=orjson.OPT_APPEND_NEWLINE)
+        # model_dump_json serializes in pydantic-core without a Python dict walk
+        return b''.join((
+            b'{"op":"upsert","job_id":', orjson.dumps(job_id),
+            b',"fields":', job.model_dump_json(exclude_none=True).encode(), b'}\n',
+        ))
+    
+    def _save_jobs(self, entries: List[bytes]):
+        """Append encoded log entries (caller holds the I/O lock)"""
+        try:
+            self._log.writelines(entries)
+            self._log.flush()
+            if self._log.tell() > self._compact_threshold:
+                self._compact()
         except Exception as e:
-            print(f"Warning: Could not save jobs to file: {e}")
+            log.warning("Could not save jobs to file: %s", e)
+    
+    def _compact(self):
+        """Rewrite the log from a snapshot of live jobs (caller holds the I/O lock)"""
+        with self._lock:
+            entries = [self._encode_entry(job_id, job) for job_id, job in self._jobs.items()]
+            indexed = list(self._index.items())
+            # The snapshot covers everything still queued; put the ids back
+            # if the rewrite fails so the writer thread appends them instead
+            queued, self._pending_writes = self._pending_writes, set()
+        tmp_path = self._jobs_log.with_suffix('.log.tmp')
+        new_index = {}
+        try:
+            with open(self._jobs_log, 'rb') as src, open(tmp_path, 'wb') as f:
+                f.writelines(entries)
+                # Historical jobs are copied line-for-line without decoding
+                for job_id, offset in indexed:
+                    src.seek(offset)
+                    new_index[job_id] = f.tell()
+                    f.write(src.readline())
+            self._log.close()
+            os.replace(tmp_path, self._jobs_log)
+            with self._lock:
+                for job_id, offset in new_index.items():
+                    if job_id in self._index:
+                        self._index[job_id] = offset
+        except Exception as e:
+            log.warning("Could not compact job log: %s", e)
+            tmp_path.unlink(missing_ok=True)
+            with self._lock:
+                self._pending_writes.update(queued)
+                if self._pending_writes:
+                    self._write_cv.notify()
+        finally:
+            if self._log.closed:
+                self._log = open(self._jobs_log, 'ab', buffering=1 << 20)
+    
+    def compact(self):
+        """Rewrite the log so it holds exactly one upsert per live job"""
+        if not self._persist:
+            return
+        with self._io_lock:
+            self._compact()
+    
+    def _mark_dirty(self, job_id: str):
+        """Queue a job for the writer thread (caller holds the lock)"""
+        self._pending_writes.add(job_id)
+        self._write_cv.notify()
+    
+    def _writer_loop(self):
+        """Background thread: coalesce queued updates into one write"""
+        while True:
+            with self._write_cv:
+                while not self._pending_writes and not self._stop_event.is_set():
+                    self._write_cv.wait()
+            if self._stop_event.is_set():
+                return
+            # Let a burst of updates accumulate before draining
+            self._stop_event.wait(self._debounce)
+            self.flush()
+    
+    def start(self):
+        """Start the background writer thread"""
+        if not self._persist or (self._writer and self._writer.is_alive()):
+            return
+        self._stop_event.clear()
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="jobstore-writer", daemon=True
+        )
+        self._writer.start()
+    
+    def flush(self):
+        """Append entries for jobs queued since the last flush"""
+        if not self._persist:
+            return
+        with self._io_lock:
+            # Snapshot under the lock, write outside it so readers never wait on disk
+            with self._lock:
+                if not self._pending_writes:
+                    return
+                job_ids, self._pending_writes = self._pending_writes, set()
+                entries = [self._encode_entry(job_id, self._jobs.get(job_id))
+                           for job_id in job_ids]
+            self._save_jobs(entries)
+    
+    def close(self):
+        """Stop the writer thread, write pending changes and compact the log"""
+        with self._write_cv:
+            self._stop_event.set()
+            self._write_cv.notify()
+        if self._writer:
+            self._writer.join()
+            self._writer = None
+        self.flush()
+        self.compact()
     
     def create_job(self, job_id: str, prompt: str, template_id: str = "default",
                    language: str = "auto", density: str = "normal") -> JobData:
         """Create a new job"""
+        now = datetime.now(timezone.utc)
+        job = JobData(
+            job_id=job_id,
+            status=JobStatus.QUEUED,
+            progress=0.0,
+            created_at=now,
+            updated_at=now,
+            prompt=prompt,
+            template_id=template_id,
+            language=language,
+            density=density
+        )
         with self._lock:
-            now = datetime.utcnow()
-            job = JobData(
-                job_id=job_id,
-                status=JobStatus.QUEUED,
-                progress=0.0,
-                created_at=now,
-                updated_at=now,
-                prompt=prompt,
-                template_id=template_id,
-                language=language,
-                density=density
-            )
             self._jobs[job_id] = job
-            self._save_jobs()
+            self._snapshot = MappingProxyType(dict(self._jobs))
+            self._mark_dirty(job_id)
             return job
     
     def get_job(self, job_id: str) -> Optional[JobData]:
-        """Get job by ID"""
+        """Get job by ID, reading historical jobs from the log on demand"""
         with self._lock:
-            return self._jobs.get(job_id)
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job
+            job = self._cache.get(job_id)
+            if job is not None:
+                self._cache.move_to_end(job_id)
+                return job
+            if job_id not in self._index:
+                return None
+        
+        with self._io_lock:
+            with self._lock:
+                offset = self._index.get(job_id)
+                if offset is None:
+                    # Modified or deleted while we waited
+                    return self._jobs.get(job_id)
+            try:
+                job = self._read_job(job_id, offset)
+            except Exception as e:
+                log.warning("Could not read job %s from file: %s", job_id, e)
+                return None
+            if job is None:
+                return None
+        
+        with self._lock:
+            if job_id not in self._index:
+                return self._jobs.get(job_id)
+            self._cache[job_id] = job
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+            return job
     
-    def update_job(self, job_id: str, **kwargs) -> Optional[JobData]:
-        """Update job fields"""
+    async def aget_job(self, job_id: str) -> Optional[JobData]:
+        """Async get_job for routes: only a disk read is moved off the event loop"""
         with self._lock:
-            job = self._jobs.get(job_id)
+            job = self._jobs.get(job_id) or self._cache.get(job_id)
+            if job is not None or job_id not in self._index:
+                return job
+        return await asyncio.to_thread(self.get_job, job_id)
+    
+    def _resident_job(self, job_id: str, loaded: Optional[JobData]) -> Optional[JobData]:
+        """Get an in-memory job, promoting a historical one (caller holds the lock)"""
+        job = self._jobs.get(job_id)
+        if job is None and job_id in self._index:
+            job = self._cache.pop(job_id, None) or loaded
+            if job is not None:
+                del self._index[job_id]
+                self._jobs[job_id] = job
+                self._snapshot = MappingProxyType(dict(self._jobs))
+        return job
+    
+    def update_job(self, job_id: str, persist: bool = False, **kwargs) -> Optional[JobData]:
+        """Update job fields
+
+        Only updates with persist=True are queued for the log. Intermediate
+        progress does not need to survive a restart, so it stays in memory
+        until the next persisted update or compaction.
+        """
+        with self._lock:
+            loaded = self._jobs.get(job_id) or self._cache.get(job_id)
+        if loaded is None:
+            loaded = self.get_job(job_id)
+            if loaded is None:
+                return None
+        
+        with self._lock:
+            job = self._resident_job(job_id, loaded)
             if not job:
                 return None
             
             for key, value in kwargs.items():
-                if hasattr(job, key):
+                if key in _JOB_FIELDS:
                     setattr(job, key, value)
             
-            job.updated_at = datetime.utcnow()
-            self._save_jobs()
+            job.updated_at = datetime.now(timezone.utc)
+            if persist:
+                self._mark_dirty(job_id)
             return job
     
     def set_status(self, job_id: str, status: JobStatus, progress: float = None,
                    error: str = None) -> Optional[JobData]:
-        """Update job status"""
-        updates = {'status': status}
+        """Update job status (in memory only; see update_job)"""
+        updates = {'status': JobStatus(status).value}
         if progress is not None:
             updates['progress'] = progress
         if error is not None:
             updates['error'] = error
-        return self.update_job(job_id, **updates)
+        return self.update_job(job_id, persist=False, **updates)
     
     def set_result(self, job_id: str, output_path: str, num_slides: int,
                    generation_time: float = None, render_time: float = None,
                    report: dict = None) -> Optional[JobData]:
-        """Set job result"""
+        """Set job result
+
+        The output file is final at this point, so it is stat'ed once here
+        and downloads can skip their own existence check.
+        """
+        output_size = None
+        try:
+            output_size = os.stat(output_path).st_size
+            output_path = os.path.abspath(output_path)
+        except OSError:
+            pass
         return self.update_job(
             job_id,
-            status=JobStatus.DONE,
+            persist=True,
+            status=JobStatus.DONE.value,
             progress=1.0,
             output_path=output_path,
+            output_size=output_size,
             num_slides=num_slides,
             generation_time=generation_time,
             render_time=render_time,
@@ -126,24 +412,46 @@ class JobStore:
         """Mark job as failed"""
         return self.update_job(
             job_id,
-            status=JobStatus.FAILED,
+            persist=True,
+            status=JobStatus.FAILED.value,
             error=error
         )
     
-    def list_jobs(self) -> Dict[str, JobData]:
-        """List all jobs"""
+    def list_jobs(self) -> Mapping[str, JobData]:
+        """List jobs held in memory as a read-only view (no per-call copy)
+
+        Historical jobs that have not been touched since startup are only
+        indexed; use iter_job_ids() and get_job() to reach them.
+        """
+        return self._snapshot
+    
+    def iter_job_ids(self) -> Tuple[str, ...]:
+        """All job IDs at this moment, safe to iterate while mutating the store"""
         with self._lock:
-            return dict(self._jobs)
+            return tuple(self._jobs) + tuple(self._index)
+    
+    def dump_pretty(self) -> str:
+        """Indented JSON of every job, for debugging (the log itself stays compact)"""
+        jobs = {}
+        for job_id in self.iter_job_ids():
+            job = self.get_job(job_id)
+            if job is not None:
+                jobs[job_id] = job.model_dump(mode='json')
+        return orjson.dumps(jobs, option=orjson.OPT_INDENT_2).decode()
     
     def delete_job(self, job_id: str) -> bool:
         """Delete a job"""
         with self._lock:
             if job_id in self._jobs:
                 del self._jobs[job_id]
-                self._save_jobs()
-                return True
-            return False
-
+                self._snapshot = MappingProxyType(dict(self._jobs))
+            elif job_id in self._index:
+                del self._index[job_id]
+                self._cache.pop(job_id, None)
+            else:
+                return False
+            self._mark_dirty(job_id)
+            return True
 
 # Global job store instance
 job_store = JobStore()
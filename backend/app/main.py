@@ -8,10 +8,14 @@ Or:
     python -m uvicorn app.main:app --reload --port 8000
 """
 
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .routes.generate import router as generate_router
+from .core.job_store import job_store
+from .services.engine import shutdown_render_pool
 
 # ============================================================
 # APP CONFIGURATION
@@ -22,22 +26,19 @@ app = FastAPI(
     description="AI-powered PowerPoint generation service",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # ============================================================
 # CORS MIDDLEWARE
-# Allow frontend on localhost:8080 to access the API
+# Allow frontend on localhost:8080 (or :3000) to access the API.
+# A single regex is compiled once and matched per request.
 # ============================================================
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:8080",
-        "http://127.0.0.1:8080",
-        "http://localhost:3000",  # In case you use a different port
-        "http://127.0.0.1:3000",
-    ],
+    allow_origin_regex=r"^http://(localhost|127\.0\.0\.1):(8080|3000)$",
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -47,22 +48,27 @@ app.add_middleware(
 # ROUTES
 # ============================================================
 
+# Static bodies are serialized once at import instead of on every probe
+_HEALTH_RESPONSE = orjson.dumps({"status": "healthy", "service": "slidegen-api"})
+_ROOT_RESPONSE = orjson.dumps({
+    "service": "SlideGen API",
+    "version": "1.0.0",
+    "docs": "/docs",
+    "health": "/healthz"
+})
+
+
 # Health check endpoint
 @app.get("/healthz")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "slidegen-api"}
+    return Response(content=_HEALTH_RESPONSE, media_type="application/json")
 
 
 @app.get("/")
 async def root():
     """Root endpoint - API info"""
-    return {
-        "service": "SlideGen API",
-        "version": "1.0.0",
-        "docs": "/docs",
-        "health": "/healthz"
-    }
+    return Response(content=_ROOT_RESPONSE, media_type="application/json")
 
 
 # Include generation routes
@@ -76,6 +82,7 @@ app.include_router(generate_router, tags=["Generation"])
 @app.on_event("startup")
 async def startup_event():
     """Application startup tasks"""
+    job_store.start()
     print("=" * 50)
     print("SlideGen API Starting...")
     print("=" * 50)
@@ -88,4 +95,6 @@ async def startup_event():
 async def shutdown_event():
     """Application shutdown tasks"""
     print("SlideGen API Shutting down...")
+    job_store.close()
+    shutdown_render_pool()
 
@@ -8,10 +8,10 @@ Endpoints:
 - GET /jobs/{job_id}/report   - Get render report
 """
 
-import uuid
+import secrets
 from pathlib import Path
 from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 
 from ..schemas.job_schema import (
     GenerateRequest, GenerateResponse,
@@ -24,10 +24,12 @@ from ..services.run_pipeline import run_generation_pipeline
 
 router = APIRouter()
 
+_PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
 
 def generate_job_id() -> str:
     """Generate a unique job ID"""
-    return f"job_{uuid.uuid4().hex[:12]}"
+    return f"job_{secrets.token_hex(6)}"
 
 
 @router.post("/generate", response_model=GenerateResponse, status_code=202)
@@ -81,19 +83,21 @@ async def get_job_status(job_id: str):
     - done: Generation complete, ready for download
     - failed: Generation failed (check error field)
     """
-    job = job_store.get_job(job_id)
+    job = await job_store.aget_job(job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
     
-    return JobStatusResponse(
-        job_id=job.job_id,
-        status=job.status,
-        progress=job.progress,
-        created_at=job.created_at.isoformat(),
-        updated_at=job.updated_at.isoformat(),
-        error=job.error
-    )
+    # Returning a Response directly skips re-validating JobStatusResponse on
+    # every poll; response_model above still documents the shape
+    return ORJSONResponse(content={
+        'job_id': job.job_id,
+        'status': job.status,
+        'progress': job.progress,
+        'created_at': job.created_at.isoformat(),
+        'updated_at': job.updated_at.isoformat(),
+        'error': job.error
+    })
 
 
 @router.get("/jobs/{job_id}/download")
@@ -105,7 +109,7 @@ async def download_pptx(job_id: str):
     Returns 409 Conflict if job is not complete.
     Returns 404 if file not found.
     """
-    job = job_store.get_job(job_id)
+    job = await job_store.aget_job(job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
@@ -121,13 +125,15 @@ async def download_pptx(job_id: str):
     
     file_path = Path(job.output_path)
     
-    if not file_path.exists():
+    # output_size means set_result already stat'ed the (immutable) file
+    if job.output_size is None and not file_path.exists():
         raise HTTPException(status_code=404, detail="Output file not found")
     
+    # Job IDs are plain ASCII, so the header needs none of Starlette's filename quoting
     return FileResponse(
         path=str(file_path),
-        filename=f"presentation_{job_id}.pptx",
-        media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+        headers={"Content-Disposition": f'attachment; filename="presentation_{job_id}.pptx"'},
+        media_type=_PPTX_MIME
     )
 
 
@@ -141,7 +147,7 @@ async def get_job_report(job_id: str):
     - Overflow detection results
     - Any automatic adjustments made
     """
-    job = job_store.get_job(job_id)
+    job = await job_store.aget_job(job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
@@ -152,16 +158,16 @@ async def get_job_report(job_id: str):
             detail=f"Report only available for completed jobs. Current status: {job.status}"
         )
     
-    # Build report from stored data
+    # Build report from stored data (produced by the pipeline, so skip validation)
     report_data = job.report or {}
-    slides = []
-    
-    for slide_info in report_data.get('slides', []):
-        slides.append(SlideReportItem(
+    slides = [
+        SlideReportItem.model_construct(
             slide_id=slide_info.get('slide_id', 'unknown'),
             overflow_detected=slide_info.get('overflow_detected', False),
             actions=slide_info.get('actions', [])
-        ))
+        )
+        for slide_info in report_data.get('slides', ())
+    ]
     
     return JobReportResponse(
         job_id=job_id,
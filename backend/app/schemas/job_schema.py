@@ -3,9 +3,9 @@ Job Schema - API Request/Response Models
 """
 
 from typing import Optional, List, Dict, Any, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 class JobStatus(str, Enum):
@@ -57,13 +57,21 @@ class JobReportResponse(BaseModel):
     render_time: Optional[float] = None
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class JobData(BaseModel):
     """Internal job data model"""
+    # Assignments from JobStore.update_job are not re-validated; callers
+    # pass plain status values
+    model_config = ConfigDict(use_enum_values=True, validate_assignment=False)
+    
     job_id: str
     status: JobStatus = JobStatus.QUEUED
     progress: float = 0.0
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_utcnow)
+    updated_at: datetime = Field(default_factory=_utcnow)
     error: Optional[str] = None
     
     # Request data
@@ -74,11 +82,9 @@ class JobData(BaseModel):
     
     # Result data
     output_path: Optional[str] = None
+    output_size: Optional[int] = None  # bytes; set once the file is stat'ed
     num_slides: int = 0
     generation_time: Optional[float] = None
     render_time: Optional[float] = None
     report: Optional[Dict[str, Any]] = None
 
-    class Config:
-        use_enum_values = True
-
@@ -15,53 +15,182 @@ def truncate(text, max_len):
 
 
 ##LLM调用封装
-from openai import OpenAI
-
-client = OpenAI()
-
-def call_llm(prompt, temperature=0.3):
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You generate structured presentation slides."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=temperature
-    )
+import asyncio
+import weakref
+from openai import AsyncOpenAI
+
+# 同时在途的 LLM 请求上限（遵守 OpenAI 速率限制）
+LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", "8"))
+
+# client 和 semaphore 绑定事件循环，每个 loop 各建一份
+_loop_state = weakref.WeakKeyDictionary()
+
+def _get_loop_state():
+    loop = asyncio.get_running_loop()
+    state = _loop_state.get(loop)
+    if state is None:
+        state = (AsyncOpenAI(), asyncio.Semaphore(LLM_CONCURRENCY))
+        _loop_state[loop] = state
+    return state
+
+#关闭当前 loop 的 client；asyncio.run 每次新建 loop，loop 结束前须释放其连接池
+async def close_llm_client():
+    state = _loop_state.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state[0].close()
+
+async def _request_llm(prompt, temperature):
+    client, semaphore = _get_loop_state()
+    async with semaphore:
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You generate structured presentation slides."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature
+        )
     return response.choices[0].message.content
 
 
 
-##json鲁棒解析和自修复
-import json
+##相同 prompt 的进程内 LRU 缓存（可选 diskcache 落盘，多进程共享）
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+LLM_CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR")
+
+_cache_lock = threading.Lock()
+_text_cache = OrderedDict()   # key -> LLM 原始回复
+_json_cache = OrderedDict()   # key -> 解析后的 JSON
+_disk_cache = diskcache.Cache(LLM_CACHE_DIR) if diskcache and LLM_CACHE_DIR else None
+
+def _cache_key(prompt, temperature):
+    digest = hashlib.blake2b(prompt.strip().encode(), digest_size=16).hexdigest()
+    return f"{digest}:{float(temperature)}"
+
+def _cache_get(cache, key):
+    with _cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+def _cache_put(cache, key, value):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > LLM_CACHE_SIZE:
+            cache.popitem(last=False)
+
+async def call_llm(prompt, temperature=0.3):
+    key = _cache_key(prompt, temperature)
+    content = _cache_get(_text_cache, key)
+    if content is not None:
+        return content
+    if _disk_cache is not None:
+        content = _disk_cache.get(key)
+    if content is None:
+        content = await _request_llm(prompt, temperature)
+        if _disk_cache is not None:
+            _disk_cache.set(key, content)
+    _cache_put(_text_cache, key, content)
+    return content
+
+#调用 + 解析一起缓存；返回副本，调用方可随意修改
+async def call_llm_json(prompt, temperature=0.3):
+    key = _cache_key(prompt, temperature)
+    parsed = _cache_get(_json_cache, key)
+    if parsed is None:
+        parsed = await safe_json_parse(await call_llm(prompt, temperature))
+        _cache_put(_json_cache, key, parsed)
+    return copy.deepcopy(parsed)
+
+
+
+##json鲁棒解析和自修复（orjson：Rust 实现，直接接受 str）
 import re
+import orjson
+
+_FENCE_RE = re.compile(r"```json|```")
+_SLIDE_COUNT_RE = re.compile(r'(\d+)\s*(页|页数|张|张幻灯片|slide|slides|page|pages)', re.I)
 
-def repair_json_with_llm(bad_json):
+async def repair_json_with_llm(bad_json):
     prompt = f"""
 Fix the following JSON. Output valid JSON only.
 
 {bad_json}
 """
-    fixed = call_llm(prompt, temperature=0)
-    return json.loads(fixed)
+    fixed = await call_llm(prompt, temperature=0)
+    return orjson.loads(fixed)
+
+#快速路径：切片判断代码块围栏，find/rfind 定位 JSON 主体，不走正则
+def _extract_json_body(text):
+    text = text.strip()
+    if text[:3] == "```":
+        newline = text.find("\n")
+        text = text[newline + 1:] if newline != -1 else text[3:]
+        if text[-3:] == "```":
+            text = text[:-3]
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        return text[start:end + 1]
+    return text.strip()
+
+async def safe_json_parse(text):
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
 
-def safe_json_parse(text):
+    body = _extract_json_body(text)
     try:
-        return json.loads(text)
-    except Exception:
-        cleaned = re.sub(r"```json|```", "", text).strip()
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        pass
+
+    # 括号配平却仍解析失败，再试一次老的正则清洗
+    if body.count("{") == body.count("}"):
+        cleaned = _FENCE_RE.sub("", text).strip()
         try:
-            return json.loads(cleaned)
-        except Exception:
-            return repair_json_with_llm(cleaned)
+            return orjson.loads(cleaned)
+        except orjson.JSONDecodeError:
+            pass
+    return await repair_json_with_llm(body)
 
 
 
 #语义压缩
-def shorten_text_semantically(text, max_len):
+import textwrap
+
+# 离线按词截断保留的词数不低于该比例时，不再请求 LLM
+OFFLINE_SHORTEN_MIN_WORDS = 0.6
+
+def _shorten_offline(text, max_len):
+    shortened = textwrap.shorten(text, width=max_len, placeholder="...")
+    kept = shortened[:-3] if shortened.endswith("...") else shortened
+    words = text.split()
+    if words and len(kept.split()) / len(words) >= OFFLINE_SHORTEN_MIN_WORDS:
+        return shortened
+    return None
+
+async def shorten_text_semantically(text, max_len):
     if len(text) <= max_len:
         return text
 
+    # 只是略微超长时按词边界截断即可，省一次 LLM 往返
+    shortened = _shorten_offline(text, max_len)
+    if shortened is not None:
+        return shortened
+
     prompt = f"""
 Rewrite the following text to be <= {max_len} characters
 while preserving its original meaning.
@@ -73,7 +202,7 @@ Output JSON only:
 {{ "text": "..." }}
 """
     try:
-        result = safe_json_parse(call_llm(prompt, temperature=0))
+        result = await call_llm_json(prompt, temperature=0)
         rewritten = result["text"]
         if len(rewritten) <= max_len:
             return rewritten
@@ -83,15 +212,23 @@ Output JSON only:
     # 最后兜底（极少触发）
     return text[:max_len - 3] + "..."
 
+#(text, max_len) 批量适配：已满足长度的直接返回原文，只为超长文本并发压缩
+async def _fit(*pairs):
+    results = [text for text, _ in pairs]
+    too_long = [i for i, (text, max_len) in enumerate(pairs) if len(text) > max_len]
+    if too_long:
+        shortened = await asyncio.gather(*(
+            shorten_text_semantically(*pairs[i]) for i in too_long
+        ))
+        for i, text in zip(too_long, shortened):
+            results[i] = text
+    return results
+
 
 
 #兜底函数
 def extract_slide_count_fallback(text):
-    match = re.search(
-        r'(\d+)\s*(页|页数|张|张幻灯片|slide|slides|page|pages)',
-        text,
-        re.I
-    )
+    match = _SLIDE_COUNT_RE.search(text)
     if match:
         return int(match.group(1))
     return None
@@ -99,7 +236,7 @@ def extract_slide_count_fallback(text):
 
 
 #用户意图分析
-def parse_user_intent(user_request):
+async def parse_user_intent(user_request):
     prompt = f"""
 Extract presentation intent.
 
@@ -114,7 +251,7 @@ Output JSON only:
 User request:
 {user_request}
 """
-    intent = safe_json_parse(call_llm(prompt))
+    intent = await call_llm_json(prompt)
 
     # ===== 新增：页数兜底解析 =====
     if intent.get("slide_count") is None:
@@ -128,7 +265,7 @@ User request:
 
 
 #metadata(title+theme)
-def generate_metadata(user_request):
+async def generate_metadata(user_request):
     prompt = f"""
 Generate presentation metadata.
 
@@ -145,12 +282,12 @@ Output JSON only:
 User request:
 {user_request}
 """
-    return safe_json_parse(call_llm(prompt))
+    return await call_llm_json(prompt)
 
 
 
 #让llm生成outline草案
-def generate_outline_with_llm(intent):
+async def generate_outline_with_llm(intent):
     topic = intent.get("topic") or intent.get("title") or "Presentation Topic"
     tone = intent.get("tone", "neutral")
 
@@ -180,19 +317,22 @@ Output JSON only:
   ]
 }}
 """
-    response = call_llm(prompt, temperature=0.3)
-    parsed = safe_json_parse(response)
+    parsed = await call_llm_json(prompt, temperature=0.3)
 
     return parsed["outline"]
 
 
 #outline规范化
+from itertools import chain
+
 ALLOWED_SLIDE_TYPES = {
     "title", "section", "content", "two_column", "closing"
 }
 
 def normalize_outline(outline, target_slides=None):
     normalized = []
+    seen = set()  # 出现过的 slide_type，后续检查不再逐个扫描
+    title_count = 0
 
     for item in outline:
         slide_type = item.get("slide_type", "content")
@@ -202,27 +342,31 @@ def normalize_outline(outline, target_slides=None):
             slide_type = "content"
 
         normalized.append((slide_type, title))
+        seen.add(slide_type)
+        title_count += slide_type == "title"
 
     # ---- 强制结构修正 ----
 
     # 1. 确保只有一个 title（始终强制）
-    titles = [i for i, s in enumerate(normalized) if s[0] == "title"]
-    if not titles:
+    if "title" not in seen:
         normalized.insert(0, ("title", "Presentation Title"))
-    elif len(titles) > 1:
-        first = titles[0]
+        seen.add("title")
+    elif title_count > 1:
+        first = next(i for i, s in enumerate(normalized) if s[0] == "title")
         normalized = [
             s if i == first else ("content", s[1])
             for i, s in enumerate(normalized)
         ]
+        seen = {"title", "content"}  # 除第一个 title 外全部转成了 content
 
     # 2. 确保 closing（始终强制）
-    if not any(s[0] == "closing" for s in normalized):
+    if "closing" not in seen:
         normalized.append(("closing", "Conclusion"))
+        seen.add("closing")
 
     # 3. 至少一个 two_column（仅当页数允许时插入）
     if target_slides is None or target_slides >= 4:  # 新增条件：仅当 >=4页时强制
-        if not any(s[0] == "two_column" for s in normalized):
+        if "two_column" not in seen:
             for i, (t, _) in enumerate(normalized):
                 if t == "closing":
                     normalized.insert(i, ("two_column", "Comparison"))
@@ -232,36 +376,28 @@ def normalize_outline(outline, target_slides=None):
 
     # 4. 页数控制（正确顺序：title -> 其他 -> closing）
     if target_slides is not None:
-        fixed = []
-        title_slides = [s for s in normalized if s[0] == "title"]
-        section_slides = [s for s in normalized if s[0] == "section"]
-        two_column_slides = [s for s in normalized if s[0] == "two_column"]
-        closing_slides = [s for s in normalized if s[0] == "closing"]
-        content_slides = [
-            s for s in normalized
-            if s[0] not in ("title", "section", "two_column", "closing")
-        ]
-
-        # 优先放 title（第一页）
-        fixed.extend(title_slides)
-
-        # 计算剩余槽位（扣除 title 和 closing）
-        remaining_slots = target_slides - len(title_slides) - len(closing_slides)
-        if remaining_slots < 0:
-            remaining_slots = 0
-
-        # 放 section、two_column、content（顺序：section -> two_column -> content）
-        if section_slides and remaining_slots > 0:
-            fixed.extend(section_slides[:remaining_slots])
-            remaining_slots -= len(section_slides[:remaining_slots])
-        if two_column_slides and remaining_slots > 0:
-            fixed.extend(two_column_slides[:remaining_slots])
-            remaining_slots -= len(two_column_slides[:remaining_slots])
-        if content_slides and remaining_slots > 0:
-            fixed.extend(content_slides[:remaining_slots])
-        # 如果仍不足，添加 content
-        while len(fixed) < target_slides - len(closing_slides):
-            fixed.append(("content", "Additional Content"))
+        # 一趟分桶（类型已在上面规范化到 ALLOWED_SLIDE_TYPES）
+        buckets = {t: [] for t in ("title", "section", "two_column", "content", "closing")}
+        for s in normalized:
+            buckets[s[0]].append(s)
+        title_slides, closing_slides = buckets["title"], buckets["closing"]
+
+        # 剩余槽位（扣除 title 和 closing）按 section -> two_column -> content 依次分配
+        remaining_slots = max(0, target_slides - len(title_slides) - len(closing_slides))
+        n_section = min(len(buckets["section"]), remaining_slots)
+        n_two_column = min(len(buckets["two_column"]), remaining_slots - n_section)
+        n_content = min(len(buckets["content"]), remaining_slots - n_section - n_two_column)
+        fixed = list(chain(
+            title_slides,
+            buckets["section"][:n_section],
+            buckets["two_column"][:n_two_column],
+            buckets["content"][:n_content],
+        ))
+
+        # 如果仍不足，一次补齐 content
+        shortfall = target_slides - len(closing_slides) - len(fixed)
+        if shortfall > 0:
+            fixed.extend([("content", "Additional Content")] * shortfall)
 
         # closing 永远最后
         fixed.extend(closing_slides)
@@ -272,8 +408,8 @@ def normalize_outline(outline, target_slides=None):
 
 
 ##outline(slide_type+title)
-def generate_outline(intent):
-    raw_outline = generate_outline_with_llm(intent)
+async def generate_outline(intent):
+    raw_outline = await generate_outline_with_llm(intent)
     outline = normalize_outline(raw_outline, intent.get("slide_count"))
 
     print("USER NUM_SLIDES:", intent.get("slide_count"))
@@ -290,18 +426,15 @@ def generate_outline(intent):
 
 
 #body_points生成(content页)
-ROLE_TO_LEVEL = {
-    "main": 0,
-    "support": 1,
-    "detail": 2
+# role -> (level, priority)
+ROLE_META = {
+    "main": (0, "critical"),
+    "support": (1, "high"),
+    "detail": (2, "normal")
 }
+DEFAULT_ROLE_META = (1, "normal")
 
-ROLE_TO_PRIORITY = {
-    "main": "critical",
-    "support": "high",
-    "detail": "normal"
-}
-def enforce_body_point_count(points, title, tone, min_n=4, max_n=6):
+async def enforce_body_point_count(points, title, tone, min_n=4, max_n=6):
     if len(points) >= min_n and len(points) <= max_n:
         return points[:max_n]
 
@@ -329,7 +462,7 @@ Output JSON only:
 {{ "points": [{{"text": "...", "role": "support"}}] }}
 """
 
-    parsed = safe_json_parse(call_llm(prompt))
+    parsed = await call_llm_json(prompt)
     new_points = []
 
     for p in parsed["points"]:
@@ -343,7 +476,7 @@ Output JSON only:
 
 
 
-def generate_body_points(title, content_text, tone):
+async def generate_body_points(title, content_text, tone):
     prompt = f"""
 Generate 4–6 body points for a presentation slide.
 
@@ -369,26 +502,32 @@ Output JSON only:
   ]
 }}
 """
-    parsed = safe_json_parse(call_llm(prompt))
-    raw_points = parsed["points"]
+    parsed = await call_llm_json(prompt)
+    return await build_body_points(parsed["points"], title, tone)
+
+
+#LLM 原始 points -> body_points（压缩、映射层级、补足条数）
+async def build_body_points(raw_points, title, tone):
+    # 只有超长的条目才需要压缩；各条互不依赖，并发执行
+    texts = await _fit(*((p["text"], 100) for p in raw_points))
 
     body_points = []
-    for p in raw_points:
-        role = p.get("role", "support")
+    for p, text in zip(raw_points, texts):
+        level, priority = ROLE_META.get(p.get("role", "support"), DEFAULT_ROLE_META)
 
         body_points.append({
-            "text": shorten_text_semantically(p["text"], 100),
-            "level": ROLE_TO_LEVEL.get(role, 1),
-            "priority": ROLE_TO_PRIORITY.get(role, "normal")
+            "text": text,
+            "level": level,
+            "priority": priority
         })
-    body_points = enforce_body_point_count(body_points,title,tone)
+    body_points = await enforce_body_point_count(body_points,title,tone)
 
     return body_points
 
 
 
 #title/section/closing页
-def generate_subtitle(title, hint):
+async def generate_subtitle(title, hint):
     prompt = f"""
 Generate a subtitle.
 
@@ -404,13 +543,13 @@ Hint:
 Output JSON only:
 {{"subtitle": "..."}}
 """
-    return safe_json_parse(call_llm(prompt))["subtitle"]
+    return (await call_llm_json(prompt))["subtitle"]
 
 
 
 
 #two_column页
-def generate_two_column(title, content_text):
+async def generate_two_column(title, content_text):
     prompt = f"""
 Generate a two-column slide.
 
@@ -430,63 +569,216 @@ Output JSON only:
   "right_column": ["...", "..."]
 }}
 """
-    return safe_json_parse(call_llm(prompt))
+    return await call_llm_json(prompt)
+
+
 
 
+#批量生成（row-marshal）：一次 prompt 产出多页内容，摊薄每次调用的固定开销
+SUBTITLE_HINTS = {
+    "title": "Opening",
+    "section": "Section Overview",
+    "closing": "Wrap-up"
+}
+
+# 单个批量 prompt 的最大页数；再大延迟增长明显
+MAX_BATCH_SLIDES = 12
+
+async def _generate_slide_batch(batch, content_text, tone):
+    slide_lines = "\n".join(
+        f"slide_{idx} ({slide_type}"
+        + (f", {SUBTITLE_HINTS[slide_type]}" if slide_type in SUBTITLE_HINTS else "")
+        + f"): {title}"
+        for idx, slide_type, title in batch
+    )
+    prompt = f"""
+Generate the content of several presentation slides at once.
+
+Rules:
+- title / section / closing slides: "subtitle" ≤ 80 characters
+- content slides: 4–6 "body_points", each text ≤ 100 characters, each with a role:
+  - main: core takeaway of the slide
+  - support: explanation or reasoning
+  - detail: example or detail
+- two_column slides: "left_column" and "right_column", 2–3 bullets each, each ≤ 100 characters
+- Use provided content if available
+- Tone: {tone}
+
+Slides:
+{slide_lines}
+
+Content:
+{content_text or "N/A"}
+
+Output JSON only, one entry per slide, using its idx:
+{{
+  "slides": [
+    {{ "idx": 0, "subtitle": "..." }},
+    {{ "idx": 1, "body_points": [{{ "text": "...", "role": "main" }}] }},
+    {{ "idx": 2, "left_column": ["..."], "right_column": ["..."] }}
+  ]
+}}
+"""
+    try:
+        parsed = await call_llm_json(prompt)
+        return {
+            entry["idx"]: entry
+            for entry in parsed["slides"]
+            if isinstance(entry, dict) and isinstance(entry.get("idx"), int)
+        }
+    except Exception:
+        # 整批失败时交给逐页生成兜底
+        return {}
+
+async def generate_all_slide_bodies(outline, content_text, tone, title_text=None):
+    slides = [
+        (idx, slide_type, title_text if slide_type == "title" and title_text else title)
+        for idx, (slide_type, title) in enumerate(outline)
+    ]
+    batches = [
+        slides[i:i + MAX_BATCH_SLIDES]
+        for i in range(0, len(slides), MAX_BATCH_SLIDES)
+    ]
+    results = await asyncio.gather(*(
+        _generate_slide_batch(batch, content_text, tone) for batch in batches
+    ))
+    bodies = {}
+    for result in results:
+        bodies.update(result)
+    return bodies
+
+def _is_text_list(value):
+    return isinstance(value, list) and bool(value) and all(
+        isinstance(v, str) and v.strip() for v in value
+    )
+
+#批量结果中缺失或格式不对的页返回 None，走逐页生成
+def validate_batched_body(slide_type, entry):
+    if not entry:
+        return None
+    if slide_type in SUBTITLE_HINTS:
+        subtitle = entry.get("subtitle")
+        if isinstance(subtitle, str) and subtitle.strip():
+            return {"subtitle": subtitle}
+    elif slide_type == "content":
+        points = entry.get("body_points")
+        if isinstance(points, list) and points and all(
+            isinstance(p, dict) and isinstance(p.get("text"), str) and p["text"].strip()
+            for p in points
+        ):
+            return {"body_points": points}
+    elif slide_type == "two_column":
+        left, right = entry.get("left_column"), entry.get("right_column")
+        if _is_text_list(left) and _is_text_list(right):
+            return {"left_column": left, "right_column": right}
+    return None
+
+
+
+#单页生成（各页之间互不依赖，可并发）
+async def generate_slide(slide_type, title, metadata, intent, content_text=None,
+                         batched=None):
+    # batched: validate_batched_body 的结果；为 None 时逐页调用 LLM
+    if slide_type == "title":
+        raw_title = metadata["title"]
+        if batched:
+            raw_subtitle = batched["subtitle"]
+        else:
+            raw_subtitle = await generate_subtitle(metadata["title"], "Opening")
+        short_title, short_subtitle = await _fit((raw_title, 50), (raw_subtitle, 80))
+        return {
+            "slide_type": "title",
+            "title": short_title,
+            "subtitle": short_subtitle
+        }
+
+    if slide_type == "section":
+        if batched:
+            raw_subtitle = batched["subtitle"]
+        else:
+            raw_subtitle = await generate_subtitle(title, "Section Overview")
+        short_title, short_subtitle = await _fit((title, 50), (raw_subtitle, 80))
+        return {
+            "slide_type": "section",
+            "title": short_title,
+            "subtitle": short_subtitle
+        }
+
+    if slide_type == "content":
+        if batched:
+            points_task = build_body_points(batched["body_points"], title, intent["tone"])
+        else:
+            points_task = generate_body_points(title, content_text, intent["tone"])
+        if len(title) <= 50:
+            short_title, body_points = title, await points_task
+        else:
+            short_title, body_points = await asyncio.gather(
+                shorten_text_semantically(title, 50),
+                points_task
+            )
+        return {
+            "slide_type": "content",
+            "title": short_title,
+            "body_points": body_points
+        }
+
+    if slide_type == "two_column":
+        if batched:
+            short_title, = await _fit((title, 50))
+            cols = batched
+        elif len(title) <= 50:
+            short_title, cols = title, await generate_two_column(title, content_text)
+        else:
+            short_title, cols = await asyncio.gather(
+                shorten_text_semantically(title, 50),
+                generate_two_column(title, content_text)
+            )
+        return {
+            "slide_type": "two_column",
+            "title": short_title,
+            "left_column": cols["left_column"],
+            "right_column": cols["right_column"]
+        }
+
+    if slide_type == "closing":
+        if batched:
+            raw_subtitle = batched["subtitle"]
+        else:
+            raw_subtitle = await generate_subtitle(title, "Wrap-up")
+        short_title, short_subtitle = await _fit((title, 50), (raw_subtitle, 80))
+        return {
+            "slide_type": "closing",
+            "title": short_title,
+            "subtitle": short_subtitle
+        }
+
+    return None
+
 
 
 #pipeline
-def generate_presentation(user_request, content_text=None):
-    intent = parse_user_intent(user_request)
-    metadata = generate_metadata(user_request)
-    outline = generate_outline(intent)
-
-    slides = []
-
-    for slide_type, title in outline:
-        if slide_type == "title":
-            raw_title = metadata["title"]
-            raw_subtitle = generate_subtitle(metadata["title"], "Opening")
-
-            slides.append({
-                "slide_type": "title",
-                "title": shorten_text_semantically(raw_title, 50),
-                "subtitle": shorten_text_semantically(raw_subtitle, 80)
-            })
-
-        elif slide_type == "section":
-            # ===== 新增的分支 =====
-            raw_subtitle = generate_subtitle(title, "Section Overview")
-            slides.append({
-                "slide_type": "section",
-                "title": shorten_text_semantically(title, 50),
-                "subtitle": shorten_text_semantically(raw_subtitle, 80)
-            })
-            # =====================
-
-        elif slide_type == "content":
-            slides.append({
-                "slide_type": "content",
-                "title": shorten_text_semantically(title, 50),
-                "body_points": generate_body_points(title, content_text, intent["tone"])
-            })
-
-        elif slide_type == "two_column":
-            cols = generate_two_column(title, content_text)
-            slides.append({
-                "slide_type": "two_column",
-                "title": shorten_text_semantically(title, 50),
-                "left_column": cols["left_column"],
-                "right_column": cols["right_column"]
-            })
-
-        elif slide_type == "closing":
-            raw_subtitle = generate_subtitle(title, "Wrap-up")
-            slides.append({
-                "slide_type": "closing",
-                "title": shorten_text_semantically(title, 50),
-                "subtitle": shorten_text_semantically(raw_subtitle, 80)
-            })
+async def generate_presentation(user_request, content_text=None):
+    # intent 和 metadata 互不依赖；outline 需要 intent
+    intent, metadata = await asyncio.gather(
+        parse_user_intent(user_request),
+        generate_metadata(user_request)
+    )
+    outline = await generate_outline(intent)
+
+    # 一次（或按 MAX_BATCH_SLIDES 分几次）生成全部页内容
+    bodies = await generate_all_slide_bodies(
+        outline, content_text, intent["tone"], title_text=metadata["title"]
+    )
+
+    # 组装各页；批量结果缺失/异常的页并发回退到逐页生成，gather 保持顺序
+    results = await asyncio.gather(*(
+        generate_slide(
+            slide_type, title, metadata, intent, content_text,
+            batched=validate_batched_body(slide_type, bodies.get(idx))
+        )
+        for idx, (slide_type, title) in enumerate(outline)
+    ))
+    slides = [slide for slide in results if slide is not None]
 
     return {
         "metadata": metadata,
@@ -494,24 +786,25 @@ def generate_presentation(user_request, content_text=None):
     }
 
 
-#test1
-generate_presentation(
-    user_request="Create a 8-slide to introduce blockchain"
-)
+if __name__ == "__main__":
+    #test1
+    asyncio.run(generate_presentation(
+        user_request="Create a 8-slide to introduce blockchain"
+    ))
 
 
-#test2
-generate_presentation(
-    user_request="Create a slide to introduce blockchain"
-)
+    #test2
+    asyncio.run(generate_presentation(
+        user_request="Create a slide to introduce blockchain"
+    ))
 
 
-#test3
-generate_presentation(
-    user_request="Create a 3-slide investor pitch deck",
-    content_text="""
+    #test3
+    asyncio.run(generate_presentation(
+        user_request="Create a 3-slide investor pitch deck",
+        content_text="""
 We are building an LLM-based slide generation system.
 Target users are consultants and students.
 Key value: time saving and structure consistency.
 """
-)
+    ))
@@ -5,7 +5,7 @@ from .engine import PPTXEngine, generate_pptx
 from .overflow import TextOverflowEngine, BoundingBox, FontMetrics, TextHeightEstimator
 from .renderer import SlideRenderer, ShapeFactory
 from .metrics import LayoutQualityEvaluator, MetricsResult
-from .themes import COLOR_SCHEMES, ThemeColorScheme, get_theme, list_themes
+from .themes import COLOR_SCHEMES, ThemeColorScheme, get_theme, get_theme_rgb, list_themes
 
 __version__ = "1.0.0"
 
@@ -14,5 +14,5 @@ __all__ = [
     'TextOverflowEngine', 'BoundingBox', 'FontMetrics', 'TextHeightEstimator',
     'SlideRenderer', 'ShapeFactory',
     'LayoutQualityEvaluator', 'MetricsResult',
-    'COLOR_SCHEMES', 'ThemeColorScheme', 'get_theme', 'list_themes',
+    'COLOR_SCHEMES', 'ThemeColorScheme', 'get_theme', 'get_theme_rgb', 'list_themes',
 ]
\ No newline at end of file
@@ -1,13 +1,77 @@
 """PPTX Engine - 主入口"""
 
+import io
+import multiprocessing
+import os
+import threading
 import time
-from typing import Dict, Any, List
-from pptx import Presentation
-from pptx.util import Inches
-from .renderer import SlideRenderer
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from .renderer import SlideRenderer, normalize_slide
 from .metrics import LayoutQualityEvaluator, MetricsResult
-from .themes import COLOR_SCHEMES, get_theme, list_themes
-from .overflow import BoundingBox
+from .themes import COLOR_SCHEMES, ThemeColorScheme, get_theme, list_themes
+from .overflow import BoundingBox, BoundingBoxArray
+from .writer import StreamingPPTXWriter
+
+# 各页形状 XML 在进程池中并行构建（CPU 密集）；页数少时进程间开销大于收益，直接串行
+RENDER_WORKERS = int(os.environ.get("PPTX_RENDER_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_MIN_SLIDES = int(os.environ.get("PPTX_PARALLEL_MIN_SLIDES", "16"))
+# 大页数时跳过 python-pptx 对象树，逐页直接写入 zip（见 writer.StreamingPPTXWriter）
+STREAM_MIN_SLIDES = int(os.environ.get("PPTX_STREAM_MIN_SLIDES", "50"))
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """进程池首次使用时创建并复用
+
+    首次使用时进程内已有 JobStore 写线程、流水线线程等，直接 fork 可能复制被占用的锁
+    而使子进程死锁；因此用 forkserver（不可用时 spawn）：子进程从单线程的服务进程
+    派生，服务进程预先导入本模块，子进程不必各自重新导入依赖。
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                ctx = multiprocessing.get_context('forkserver')
+                ctx.set_forkserver_preload([__name__])
+            else:
+                ctx = multiprocessing.get_context('spawn')
+            _render_pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=ctx)
+        return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    """关闭渲染进程池（应用退出时调用；之后再用会重新创建）"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+
+
+@lru_cache(maxsize=None)
+def _template_bytes(width: float, height: float) -> bytes:
+    """按页面尺寸缓存空白模板（已设好尺寸）的 pptx 字节，每个任务从内存克隆，不再读盘"""
+    from pptx import Presentation
+    from pptx.util import Inches
+    prs = Presentation()
+    prs.slide_width = Inches(width)
+    prs.slide_height = Inches(height)
+    buf = io.BytesIO()
+    prs.save(buf)
+    return buf.getvalue()
+
+
+def _build_slide_shapes(theme: ThemeColorScheme, slide_data: Dict) -> Tuple[List[str], List]:
+    """子进程任务：返回 (形状 XML 列表, 评估输入)，只传可 pickle 的数据"""
+    metrics_inputs = []
+    shapes = SlideRenderer(theme).build_shapes(slide_data, metrics_inputs=metrics_inputs)
+    return shapes, metrics_inputs
 
 
 class PPTXEngine:
@@ -21,16 +85,15 @@ class PPTXEngine:
     def generate(self, slidedeck: Dict[str, Any], output_path: str) -> Dict[str, Any]:
         start = time.time()
         try:
-            prs = Presentation()
-            prs.slide_width = Inches(self.renderer.WIDTH)
-            prs.slide_height = Inches(self.renderer.HEIGHT)
-            
-            slides = slidedeck.get('slides', [])
-            for slide_data in slides:
-                self.renderer.render(prs, slide_data)
-            
-            prs.save(output_path)
-            metrics = self._evaluate(slides)
+            # 要点在入口一次规范化为 (text, level)，渲染（含子进程）不再逐条做类型判断
+            slides = [normalize_slide(s) for s in slidedeck.get('slides', [])]
+            # 渲染时顺带收集评估输入，不再二次遍历 slides
+            metrics_inputs = []
+            if self._can_stream(slides):
+                self._write_streaming(slides, output_path, metrics_inputs)
+            else:
+                self._write_presentation(slides, output_path, metrics_inputs)
+            metrics = self._evaluate(metrics_inputs)
             
             return {
                 'success': True,
@@ -43,21 +106,60 @@ class PPTXEngine:
         except Exception as e:
             return {'success': False, 'error_message': str(e), 'warnings': []}
     
-    def _evaluate(self, slides: List[Dict]) -> MetricsResult:
-        texts, boxes, sizes = [], [], []
-        for s in slides:
-            layout = self.renderer.get_layout(s.get('slide_type', 'content'))
-            if s.get('title'):
-                texts.append(s['title'])
-                boxes.append(layout['title'])
-                sizes.append(28)
-            points = s.get('body_points', [])
-            if points:
-                body = '\n'.join(p.get('text', '') if isinstance(p, dict) else str(p) for p in points)
-                texts.append(body)
-                boxes.append(layout.get('content', layout['title']))
-                sizes.append(18)
-        return self.evaluator.evaluate(texts, boxes, sizes)
+    def _template(self) -> bytes:
+        return _template_bytes(self.renderer.WIDTH, self.renderer.HEIGHT)
+    
+    def _write_presentation(self, slides: List[Dict], output_path: str, metrics_inputs: List) -> None:
+        # python-pptx 在首次渲染时才导入（见 renderer._lazy）
+        from pptx import Presentation
+        prs = Presentation(io.BytesIO(self._template()))
+        built = self._build_parallel(slides)
+        if built is None:
+            for slide_data in slides:
+                self.renderer.render(prs, slide_data, metrics_inputs)
+        else:
+            for slide_data, (shapes, inputs) in zip(slides, built):
+                self.renderer.render(prs, slide_data, shapes=shapes)
+                metrics_inputs.extend(inputs)
+        # python-pptx 保存时本就是紧凑序列化（etree.tostring 不带 pretty_print），
+        # 解析也不做 schema 校验，这里无需替换 OPC 写出器
+        prs.save(output_path)
+    
+    @staticmethod
+    def _can_stream(slides: List[Dict]) -> bool:
+        """流式写出只处理形状；有备注页的幻灯片走 python-pptx"""
+        return (len(slides) >= STREAM_MIN_SLIDES
+                and not any(s.get('speaker_notes') for s in slides))
+    
+    def _write_streaming(self, slides: List[Dict], output_path: str, metrics_inputs: List) -> None:
+        built = self._build_parallel(slides)
+        with StreamingPPTXWriter(output_path, self._template(), len(slides)) as writer:
+            if built is None:
+                for slide_data in slides:
+                    writer.add_slide(self.renderer.build_shapes(slide_data, metrics_inputs=metrics_inputs))
+            else:
+                for shapes, inputs in built:
+                    writer.add_slide(shapes)
+                    metrics_inputs.extend(inputs)
+    
+    def _build_parallel(self, slides: List[Dict]) -> Optional[List[Tuple[List[str], List]]]:
+        """多页时在进程池中构建各页形状；不满足条件或进程池失效时返回 None，由调用方串行渲染"""
+        if RENDER_WORKERS <= 1 or len(slides) < PARALLEL_MIN_SLIDES:
+            return None
+        chunksize = max(1, len(slides) // (RENDER_WORKERS * 4))
+        try:
+            return list(_get_render_pool().map(partial(_build_slide_shapes, self.theme),
+                                               slides, chunksize=chunksize))
+        except BrokenProcessPool:
+            shutdown_render_pool()
+            return None
+    
+    def _evaluate(self, metrics_inputs: List[Tuple[str, BoundingBox, float]]) -> MetricsResult:
+        if not metrics_inputs:
+            return self.evaluator.evaluate([], [], [])
+        texts, boxes, sizes = zip(*metrics_inputs)
+        return self.evaluator.evaluate(list(texts), BoundingBoxArray.from_boxes(boxes),
+                                       np.array(sizes, dtype=np.float64))
     
     @staticmethod
     def get_available_themes() -> List[str]:
@@ -71,4 +173,4 @@ def generate_pptx(slidedeck_json: Dict, output_path: str,
     return engine.generate(slidedeck_json, output_path)
 
 
-__all__ = ['PPTXEngine', 'generate_pptx']
\ No newline at end of file
+__all__ = ['PPTXEngine', 'generate_pptx', 'shutdown_render_pool']
\ No newline at end of file
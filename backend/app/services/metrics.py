@@ -1,8 +1,9 @@
 """布局质量评估框架"""
 
 from dataclasses import dataclass, field
-from typing import Dict, Any, List
-from .overflow import TextHeightEstimator, BoundingBox
+from typing import Dict, Any, List, Sequence, Union
+import numpy as np
+from .overflow import TextHeightEstimator, BoundingBox, BoundingBoxArray
 
 
 @dataclass
@@ -28,18 +29,20 @@ class LayoutQualityEvaluator:
     def __init__(self):
         self.estimator = TextHeightEstimator()
     
-    def evaluate(self, texts: List[str], boxes: List[BoundingBox],
-                 font_sizes: List[float]) -> MetricsResult:
+    def evaluate(self, texts: List[str], boxes: Union[BoundingBoxArray, List[BoundingBox]],
+                 font_sizes: Union[np.ndarray, Sequence[float]]) -> MetricsResult:
         if not texts:
             return MetricsResult(0, 0, 0, 0, 0)
+        if not isinstance(boxes, BoundingBoxArray):
+            boxes = BoundingBoxArray.from_boxes(boxes)
         
-        overflow = sum(1 for t, b, f in zip(texts, boxes, font_sizes)
-                      if self.estimator.estimate(t, f, b.width) > b.height)
-        tor = overflow / len(texts)
+        # 每段文本只估算一次，TOR 和 SUR 共用；其余都是数组运算
+        heights = np.array([self.estimator.estimate(t, f, w)
+                            for t, f, w in zip(texts, font_sizes, boxes.widths.tolist())])
+        tor = int(np.count_nonzero(heights > boxes.heights)) / len(texts)
         
-        total_area = sum(b.area for b in boxes)
-        used = sum(b.width * min(self.estimator.estimate(t, f, b.width), b.height)
-                  for t, b, f in zip(texts, boxes, font_sizes))
+        total_area = float(boxes.areas.sum())
+        used = float((boxes.widths * np.minimum(heights, boxes.heights)).sum())
         sur = used / total_area if total_area else 0
         sur_score = 1.0 if 0.5 <= sur <= 0.7 else min(1.0, sur / 0.7) if sur < 0.7 else max(0.5, 1.0 - (sur - 0.7) / 0.3)
         
@@ -3,10 +3,26 @@
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
+from functools import lru_cache
 import re
+import numpy as np
 
+try:
+    from .overflow_fast import wrap_line_count, fit_font_size, text_codepoints, warmup
+except ImportError:
+    # numba 未安装：使用纯 Python 换行模拟
+    wrap_line_count = fit_font_size = None
+    
+    def warmup() -> None:
+        pass
 
-@dataclass
+EMU_PER_INCH = 914400
+
+# 句末标点后切分（保留标点）
+_SENT_RE = re.compile(r'(?<=[.!?。！？])\s*')
+
+
+@dataclass(frozen=True, slots=True)
 class BoundingBox:
     """边界框（英寸）"""
     left: float
@@ -15,15 +31,36 @@ class BoundingBox:
     height: float
     
     def to_emu(self) -> Tuple[int, int, int, int]:
-        EMU = 914400
-        return (int(self.left * EMU), int(self.top * EMU),
-                int(self.width * EMU), int(self.height * EMU))
+        return (int(self.left * EMU_PER_INCH), int(self.top * EMU_PER_INCH),
+                int(self.width * EMU_PER_INCH), int(self.height * EMU_PER_INCH))
     
     @property
     def area(self) -> float:
         return self.width * self.height
 
 
+@dataclass
+class BoundingBoxArray:
+    """边界框数组（SoA 布局，英寸），供批量指标计算"""
+    lefts: np.ndarray
+    tops: np.ndarray
+    widths: np.ndarray
+    heights: np.ndarray
+    
+    @classmethod
+    def from_boxes(cls, boxes: List[BoundingBox]) -> 'BoundingBoxArray':
+        data = np.array([(b.left, b.top, b.width, b.height) for b in boxes],
+                        dtype=np.float64).reshape(-1, 4)
+        return cls(*(np.ascontiguousarray(col) for col in data.T))
+    
+    def __len__(self) -> int:
+        return len(self.widths)
+    
+    @property
+    def areas(self) -> np.ndarray:
+        return self.widths * self.heights
+
+
 class FontMetrics:
     """字体度量计算器"""
     
@@ -31,30 +68,82 @@ class FontMetrics:
     NARROW_CHARS = set('iljI1!|.,:;\'\"')
     WIDE_CHARS = set('mwMWABCDEGHKNOPQRSUVXYZ')
     
+    # 按全角宽度计算的区段：CJK 统一汉字；CJK 符号、平假名、片假名
+    CJK_RANGES = ((0x4E00, 0x9FFF), (0x3000, 0x30FF))
+    
     @classmethod
     def _is_cjk(cls, char: str) -> bool:
         code = ord(char)
-        return (0x4E00 <= code <= 0x9FFF or 0x3000 <= code <= 0x303F or
-                0x3040 <= code <= 0x309F or 0x30A0 <= code <= 0x30FF)
+        return code <= 0xFFFF and bool(_CJK_BITMAP[code >> 3] & (1 << (code & 7)))
+    
+    @classmethod
+    def char_widths(cls, text: str) -> np.ndarray:
+        """逐字符宽度（em），一次向量化查表"""
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        widths = np.full(codes.shape, cls.CHAR_WIDTH['normal'])
+        ascii_mask = codes < 128
+        widths[ascii_mask] = _ASCII_WIDTH_TABLE[codes[ascii_mask]]
+        # BMP 外的字符截到 0xFFFF（非 CJK），整段一次查表
+        widths[_CJK_TABLE[np.minimum(codes, 0xFFFF)]] = cls.CHAR_WIDTH['cjk']
+        return widths
+    
+    # 约 128 字符以内逐字符查表比构造 ndarray 更快
+    SCALAR_MAX_LEN = 128
     
     @classmethod
     def calculate_text_width(cls, text: str, font_size: float) -> float:
         if not text:
             return 0.0
-        em = font_size / 72
-        total = 0
-        for c in text:
-            if c == ' ':
-                total += cls.CHAR_WIDTH['space']
-            elif cls._is_cjk(c):
-                total += cls.CHAR_WIDTH['cjk']
-            elif c in cls.NARROW_CHARS:
-                total += cls.CHAR_WIDTH['narrow']
-            elif c in cls.WIDE_CHARS:
-                total += cls.CHAR_WIDTH['wide']
-            else:
-                total += cls.CHAR_WIDTH['normal']
-        return total * em
+        if len(text) <= cls.SCALAR_MAX_LEN:
+            normal, cjk = cls.CHAR_WIDTH['normal'], cls.CHAR_WIDTH['cjk']
+            total = 0.0
+            for c in text:
+                code = ord(c)
+                if code < 256:
+                    total += _WIDTH_VALUES[_WIDTH_CLASS[code]]
+                elif code <= 0xFFFF and _CJK_BITMAP[code >> 3] & (1 << (code & 7)):
+                    total += cjk
+                else:
+                    total += normal
+            return total * (font_size / 72)
+        return float(cls.char_widths(text).sum()) * (font_size / 72)
+
+
+# 宽度档位：_WIDTH_CLASS[code] 是 _WIDTH_VALUES 的下标（narrow/normal/wide/space）
+_WIDTH_VALUES = tuple(FontMetrics.CHAR_WIDTH[k] for k in ('narrow', 'normal', 'wide', 'space'))
+
+
+def _build_width_class() -> bytes:
+    """256 项 Latin-1 宽度档位表，默认 normal"""
+    classes = bytearray([1]) * 256
+    for c in FontMetrics.NARROW_CHARS:
+        classes[ord(c)] = 0
+    for c in FontMetrics.WIDE_CHARS:
+        classes[ord(c)] = 2
+    classes[ord(' ')] = 3
+    return bytes(classes)
+
+
+_WIDTH_CLASS = _build_width_class()
+
+
+def _build_ascii_width_table() -> np.ndarray:
+    classes = np.frombuffer(_WIDTH_CLASS, dtype=np.uint8)[:128]
+    return np.array(_WIDTH_VALUES)[classes]
+
+
+def _build_cjk_bitmap() -> bytes:
+    """BMP 全部 0x10000 个码位的 CJK 位图（8KB），第 i 位表示码位 i 是否为 CJK"""
+    bitmap = bytearray(0x10000 >> 3)
+    for lo, hi in FontMetrics.CJK_RANGES:
+        for code in range(lo, hi + 1):
+            bitmap[code >> 3] |= 1 << (code & 7)
+    return bytes(bitmap)
+
+
+_ASCII_WIDTH_TABLE = _build_ascii_width_table()
+_CJK_BITMAP = _build_cjk_bitmap()
+_CJK_TABLE = np.unpackbits(np.frombuffer(_CJK_BITMAP, dtype=np.uint8), bitorder='little').astype(bool)
 
 
 class TextHeightEstimator:
@@ -66,19 +155,22 @@ class TextHeightEstimator:
     def estimate(self, text: str, font_size: float, box_width: float) -> float:
         if not text:
             return 0.0
-        lines = self._simulate_wrap(text, font_size, box_width)
-        line_height = (font_size * self.line_spacing) / 72
-        return len(lines) * line_height
+        return _estimate_height(text, float(font_size), float(box_width), self.line_spacing)
     
-    def _simulate_wrap(self, text: str, font_size: float, width: float) -> List[str]:
+    @staticmethod
+    def _simulate_wrap(text: str, font_size: float, width: float) -> List[str]:
         lines = []
+        em = font_size / 72
         for para in text.split('\n'):
             if not para:
                 lines.append('')
                 continue
+            words = para.split(' ')
+            # 整段一次算出逐字符宽度，再按词分段求和（每段含尾随空格）
+            starts = np.cumsum([0] + [len(w) + 1 for w in words[:-1]])
+            word_widths = (np.add.reduceat(FontMetrics.char_widths(para + ' '), starts) * em).tolist()
             current, current_w = '', 0.0
-            for word in para.split(' '):
-                word_w = FontMetrics.calculate_text_width(word + ' ', font_size)
+            for word, word_w in zip(words, word_widths):
                 if current_w + word_w <= width:
                     current += word + ' '
                     current_w += word_w
@@ -91,6 +183,21 @@ class TextHeightEstimator:
         return lines or ['']
 
 
+@lru_cache(maxsize=4096)
+def _estimate_height(text: str, font_size: float, box_width: float,
+                     line_spacing: float) -> float:
+    """纯函数，按参数缓存：各策略和评估器会用相同参数反复估算"""
+    if wrap_line_count is not None:
+        widths = FontMetrics.CHAR_WIDTH
+        num_lines = wrap_line_count(text_codepoints(text), _ASCII_WIDTH_TABLE,
+                                    widths['normal'], widths['cjk'], widths['space'],
+                                    font_size / 72, box_width)
+    else:
+        num_lines = len(TextHeightEstimator._simulate_wrap(text, font_size, box_width))
+    line_height = (font_size * line_spacing) / 72
+    return num_lines * line_height
+
+
 class IOverflowStrategy(ABC):
     """溢出策略接口"""
     
@@ -106,6 +213,12 @@ class IOverflowStrategy(ABC):
     @abstractmethod
     def priority(self) -> int:
         pass
+    
+    def try_apply(self, text: str, box: BoundingBox, font_size: float) -> Optional[Dict[str, Any]]:
+        """can_handle + apply 合并为一次调用，不可处理时返回 None；子类可覆盖以避免重复计算"""
+        if self.can_handle(text, box, font_size):
+            return self.apply(text, box, font_size)
+        return None
 
 
 class FontReductionStrategy(IOverflowStrategy):
@@ -120,17 +233,46 @@ class FontReductionStrategy(IOverflowStrategy):
     def priority(self) -> int:
         return 1
     
+    def _search(self, text: str, box: BoundingBox, font_size: float) -> Tuple[bool, float]:
+        """二分查找能放下的最大字号，返回 (是否可行, 字号)
+
+        候选字号从大到小排列；估算高度随字号单调不减，
+        因此"放得下"在候选序列上是先假后真的，找第一个为真的位置即可。
+        """
+        candidates = range(int(font_size - self.step), int(self.min_font) - 1, -int(self.step))
+        if fit_font_size is not None and text:
+            # 整个查找在 numba 内核中完成，不再逐次经 Python 估算
+            widths = FontMetrics.CHAR_WIDTH
+            left = fit_font_size(text_codepoints(text), _ASCII_WIDTH_TABLE,
+                                 widths['normal'], widths['cjk'], widths['space'],
+                                 float(box.width), float(box.height),
+                                 self.estimator.line_spacing,
+                                 np.array(candidates, dtype=np.float64))
+        else:
+            left, right = 0, len(candidates)
+            while left < right:
+                mid = (left + right) // 2
+                if self.estimator.estimate(text, candidates[mid], box.width) <= box.height:
+                    right = mid
+                else:
+                    left = mid + 1
+        if left < len(candidates):
+            return True, float(candidates[left])
+        return False, self.min_font
+    
     def can_handle(self, text: str, box: BoundingBox, font_size: float) -> bool:
-        for f in range(int(font_size - self.step), int(self.min_font) - 1, -int(self.step)):
-            if self.estimator.estimate(text, f, box.width) <= box.height:
-                return True
-        return False
+        return self._search(text, box, font_size)[0]
     
     def apply(self, text: str, box: BoundingBox, font_size: float) -> Dict[str, Any]:
-        for f in range(int(font_size - self.step), int(self.min_font) - 1, -int(self.step)):
-            if self.estimator.estimate(text, f, box.width) <= box.height:
-                return {'text': text, 'font_size': float(f), 'strategy': 'font_reduction'}
-        return {'text': text, 'font_size': self.min_font, 'strategy': 'font_reduction_max'}
+        feasible, font = self._search(text, box, font_size)
+        return {'text': text, 'font_size': font,
+                'strategy': 'font_reduction' if feasible else 'font_reduction_max'}
+    
+    def try_apply(self, text: str, box: BoundingBox, font_size: float) -> Optional[Dict[str, Any]]:
+        feasible, font = self._search(text, box, font_size)
+        if not feasible:
+            return None
+        return {'text': text, 'font_size': font, 'strategy': 'font_reduction'}
 
 
 class SmartTruncationStrategy(IOverflowStrategy):
@@ -144,39 +286,64 @@ class SmartTruncationStrategy(IOverflowStrategy):
     def priority(self) -> int:
         return 2
     
-    def can_handle(self, text: str, box: BoundingBox, font_size: float) -> bool:
-        sentences = re.split(r'(?<=[.!?。！？])\s*', text)
-        if len(sentences) <= 1:
-            return False
-        selected = []
+    def _scan(self, sentences: List[str], box: BoundingBox, font_size: float) -> Tuple[int, Optional[str]]:
+        """一次遍历句子，返回 (可放入的句子数, 首次放不下之前的前缀文本；无前缀时为 None)
+
+        can_handle 统计跳过放不下句子后仍能放入的句子数；apply 只取首次失败前的前缀。
+        两者在首次失败前完全一致，因此共用一趟循环，前缀用累积字符串维护。
+        """
+        current = None
+        prefix = None
+        broken = False
+        kept = 0
         for s in sentences:
-            candidate = ' '.join(selected + [s]) + '...'
-            if self.estimator.estimate(candidate, font_size, box.width) <= box.height:
-                selected.append(s)
-        return len(selected) / len(sentences) >= self.min_retention
+            candidate = s if current is None else f"{current} {s}"
+            if self.estimator.estimate(candidate + '...', font_size, box.width) <= box.height:
+                kept += 1
+                current = candidate
+            elif not broken:
+                broken, prefix = True, current
+        return kept, prefix if broken else current
     
-    def apply(self, text: str, box: BoundingBox, font_size: float) -> Dict[str, Any]:
-        sentences = re.split(r'(?<=[.!?。！？])\s*', text)
-        selected = []
-        for s in sentences:
-            candidate = ' '.join(selected + [s]) + '...'
-            if self.estimator.estimate(candidate, font_size, box.width) <= box.height:
-                selected.append(s)
-            else:
-                break
-        truncated = ' '.join(selected) + '...' if selected else text[:50] + '...'
+    def _truncated(self, text: str, prefix: Optional[str], font_size: float) -> Dict[str, Any]:
+        truncated = prefix + '...' if prefix is not None else text[:50] + '...'
         return {'text': truncated, 'font_size': font_size, 'strategy': 'smart_truncation'}
+    
+    def can_handle(self, text: str, box: BoundingBox, font_size: float) -> bool:
+        return self.try_apply(text, box, font_size) is not None
+    
+    def apply(self, text: str, box: BoundingBox, font_size: float) -> Dict[str, Any]:
+        _, prefix = self._scan(_SENT_RE.split(text), box, font_size)
+        return self._truncated(text, prefix, font_size)
+    
+    def try_apply(self, text: str, box: BoundingBox, font_size: float) -> Optional[Dict[str, Any]]:
+        sentences = _SENT_RE.split(text)
+        if len(sentences) <= 1:
+            return None
+        kept, prefix = self._scan(sentences, box, font_size)
+        if kept / len(sentences) < self.min_retention:
+            return None
+        return self._truncated(text, prefix, font_size)
 
 
 class TextOverflowEngine:
     """文本溢出处理引擎"""
     
+    FIT_CACHE_SIZE = 4096
+    
     def __init__(self, strategies: Optional[List[IOverflowStrategy]] = None):
         self.estimator = TextHeightEstimator()
         self.strategies = strategies or [FontReductionStrategy(), SmartTruncationStrategy()]
         self.strategies.sort(key=lambda s: s.priority)
+        # 结果只取决于 (text, box, font_size) 和本实例的策略，按实例缓存；
+        # 初始化后若修改 strategies，需调用 self._fit_cached.cache_clear()
+        self._fit_cached = lru_cache(maxsize=self.FIT_CACHE_SIZE)(self._fit_text)
     
     def fit_text(self, text: str, box: BoundingBox, font_size: float = 18.0) -> Dict[str, Any]:
+        # 返回副本，调用方修改结果不会污染缓存
+        return dict(self._fit_cached(text, box, font_size))
+    
+    def _fit_text(self, text: str, box: BoundingBox, font_size: float) -> Dict[str, Any]:
         if not text:
             return {'text': '', 'font_size': font_size, 'strategy': 'empty'}
         
@@ -184,8 +351,9 @@ class TextOverflowEngine:
             return {'text': text, 'font_size': font_size, 'strategy': 'direct_fit'}
         
         for strategy in self.strategies:
-            if strategy.can_handle(text, box, font_size):
-                return strategy.apply(text, box, font_size)
+            result = strategy.try_apply(text, box, font_size)
+            if result is not None:
+                return result
         
         return self._force_truncate(text, box)
     
@@ -202,6 +370,6 @@ class TextOverflowEngine:
                 'font_size': min_font, 'strategy': 'force_truncate'}
 
 
-__all__ = ['BoundingBox', 'FontMetrics', 'TextHeightEstimator', 
+__all__ = ['BoundingBox', 'BoundingBoxArray', 'FontMetrics', 'TextHeightEstimator', 
            'IOverflowStrategy', 'FontReductionStrategy', 
            'SmartTruncationStrategy', 'TextOverflowEngine']
\ No newline at end of file
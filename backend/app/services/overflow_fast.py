@@ -0,0 +1,91 @@
+"""文本换行的 Numba 加速内核
+
+可选依赖：未安装 numba 时导入失败，overflow.py 回退到纯 Python 路径。
+只返回行数，不生成行字符串；fit_font_size 在内核中完成字号缩减的二分查找。
+"""
+
+import numpy as np
+from numba import njit
+
+_NEWLINE = 10
+_SPACE = 32
+
+
+@njit(cache=True)
+def _char_width_nb(code, ascii_table, normal, cjk):
+    if code < 128:
+        return ascii_table[code]
+    if (0x4E00 <= code <= 0x9FFF) or (0x3000 <= code <= 0x30FF):
+        return cjk
+    return normal
+
+
+@njit(cache=True)
+def wrap_line_count(codes, ascii_table, normal, cjk, space, em, width):
+    """与 TextHeightEstimator._simulate_wrap 相同的换行规则，返回行数"""
+    lines = 0
+    n = codes.shape[0]
+    para_len = 0
+    word_sum = 0.0
+    current_w = 0.0
+    has_current = False
+    for i in range(n + 1):
+        code = codes[i] if i < n else _NEWLINE
+        if code != _SPACE and code != _NEWLINE:
+            word_sum += _char_width_nb(code, ascii_table, normal, cjk)
+            para_len += 1
+            continue
+        if code == _NEWLINE and para_len == 0:
+            # 空段落占一行
+            lines += 1
+            continue
+        # 一个词结束（宽度含尾随空格）
+        word_w = (word_sum + space) * em
+        if current_w + word_w <= width:
+            current_w += word_w
+        else:
+            if has_current:
+                lines += 1
+            current_w = word_w
+        has_current = True
+        word_sum = 0.0
+        para_len += 1
+        if code == _NEWLINE:
+            lines += 1
+            para_len = 0
+            current_w = 0.0
+            has_current = False
+    return max(lines, 1)
+
+
+@njit(cache=True)
+def fit_font_size(codes, ascii_table, normal, cjk, space, width, height,
+                  line_spacing, candidates):
+    """在从大到小排列的候选字号中二分查找第一个放得下的，返回其下标（都放不下时为 len）
+
+    高度算法与 overflow._estimate_height 相同：行数 × (字号 × 行距 / 72)。
+    """
+    left, right = 0, candidates.shape[0]
+    while left < right:
+        mid = (left + right) // 2
+        font_size = candidates[mid]
+        lines = wrap_line_count(codes, ascii_table, normal, cjk, space, font_size / 72, width)
+        if lines * ((font_size * line_spacing) / 72) <= height:
+            right = mid
+        else:
+            left = mid + 1
+    return left
+
+
+def text_codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+
+def warmup() -> None:
+    """按实际调用的参数类型触发编译（或加载磁盘缓存），避免首个请求承担 JIT 开销"""
+    codes, table = text_codepoints('warm up'), np.full(128, 0.55)
+    wrap_line_count(codes, table, 0.55, 1.0, 0.28, 0.25, 1.0)
+    fit_font_size(codes, table, 0.55, 1.0, 0.28, 1.0, 1.0, 1.15, np.array([16.0, 12.0]))
+
+
+__all__ = ['wrap_line_count', 'fit_font_size', 'text_codepoints', 'warmup']
@@ -1,126 +1,269 @@
 """PPTX渲染器"""
 
-from typing import Any, List, Dict
-from pptx import Presentation
-from pptx.util import Pt, Emu
-from pptx.enum.text import PP_ALIGN
-from pptx.enum.shapes import MSO_SHAPE
+import re
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, List, Dict, Mapping, Optional, Tuple
+from xml.sax.saxutils import escape as xml_escape
 from .overflow import BoundingBox, TextOverflowEngine
 from .themes import ThemeColorScheme
 
+if TYPE_CHECKING:
+    from pptx.presentation import Presentation
+
+# python-pptx（连带 lxml）导入较重：构建形状 XML 不需要它，只在插入幻灯片时由 _lazy() 加载
+parse_xml = None
+_LOADED = False
+
+
+def _lazy() -> None:
+    global parse_xml, _LOADED
+    if not _LOADED:
+        from pptx.oxml import parse_xml
+        _LOADED = True
+
+
+_NSDECLS = ('xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+            'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"')
+
+# 段落对齐（a:pPr/@algn），与 PP_ALIGN.LEFT / PP_ALIGN.CENTER 的 xml_value 相同
+ALIGN_LEFT, ALIGN_CENTER = 'l', 'ctr'
+
+
+# 形状 XML 模板：直接生成 <p:sp> 片段插入 spTree，绕开 python-pptx 的逐属性代理对象。
+# 结构与 add_textbox / add_shape 生成的 XML 一致。
+_TEXTBOX_XML = (
+    '<p:sp %s>'
+    '<p:nvSpPr><p:cNvPr id="{id}" name="TextBox {num}"/><p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+    '<p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/></p:spPr>'
+    '<p:txBody><a:bodyPr wrap="square"><a:spAutoFit/></a:bodyPr><a:lstStyle/>{paragraphs}</p:txBody>'
+    '</p:sp>'
+) % _NSDECLS
+
+_PARAGRAPH_XML = (
+    '<a:p><a:pPr{attrs}><a:defRPr sz="{sz}"{bold}>'
+    '<a:solidFill><a:srgbClr val="{color}"/></a:solidFill></a:defRPr></a:pPr>{runs}</a:p>'
+)
+
+_RECTANGLE_XML = (
+    '<p:sp %s>'
+    '<p:nvSpPr><p:cNvPr id="{id}" name="Rectangle {num}"/><p:cNvSpPr/><p:nvPr/></p:nvSpPr>'
+    '<p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom>'
+    '<a:solidFill><a:srgbClr val="{color}"/></a:solidFill><a:ln><a:noFill/></a:ln></p:spPr>'
+    '<p:style><a:lnRef idx="1"><a:schemeClr val="accent1"/></a:lnRef>'
+    '<a:fillRef idx="3"><a:schemeClr val="accent1"/></a:fillRef>'
+    '<a:effectRef idx="2"><a:schemeClr val="accent1"/></a:effectRef>'
+    '<a:fontRef idx="minor"><a:schemeClr val="lt1"/></a:fontRef></p:style>'
+    '<p:txBody><a:bodyPr rtlCol="0" anchor="ctr"/><a:lstStyle/><a:p><a:pPr algn="ctr"/></a:p></p:txBody>'
+    '</p:sp>'
+) % _NSDECLS
+
+# 与 python-pptx 一致：\n / \v 转为 <a:br/>，其余控制字符转义为 _xHHHH_
+_LINE_BREAK_RE = re.compile('\n|\v')
+_CTRL_CHAR_RE = re.compile(r'([\x00-\x08\x0B-\x1F])')
+
+
+def _runs_xml(text: str) -> str:
+    parts = []
+    for i, piece in enumerate(_LINE_BREAK_RE.split(text)):
+        if i:
+            parts.append('<a:br/>')
+        if piece:
+            piece = _CTRL_CHAR_RE.sub(lambda m: '_x%04X_' % ord(m.group(1)), piece)
+            parts.append(f'<a:r><a:t>{xml_escape(piece)}</a:t></a:r>')
+    return ''.join(parts)
+
+
+def _centipoints(font_size: float) -> int:
+    """字号（pt）转 a:defRPr/@sz 的百分之一磅，截断方式与 pptx.util.Pt(font_size).centipoints 相同"""
+    return int(font_size * 12700) // 127
+
+
+def _paragraph_xml(text: str, sz: int, color: str, attrs: str = '', bold: str = '') -> str:
+    return _PARAGRAPH_XML.format(attrs=attrs, sz=sz, bold=bold, color=color,
+                                 runs=_runs_xml(text))
+
 
 class ShapeFactory:
-    """形状工厂"""
+    """形状工厂：*_xml 按给定 shape id 生成 <p:sp> 片段（可跨进程传递），create_* 直接插入幻灯片"""
     
     @staticmethod
-    def create_text_box(slide, box: BoundingBox, text: str, font_size: float,
-                        color, bold: bool = False, align=PP_ALIGN.LEFT):
+    def _sp_xml(template: str, shape_id: int, box: BoundingBox, **fields) -> str:
         left, top, width, height = box.to_emu()
-        shape = slide.shapes.add_textbox(Emu(left), Emu(top), Emu(width), Emu(height))
-        tf = shape.text_frame
-        tf.word_wrap = True
-        p = tf.paragraphs[0]
-        p.text = text
-        p.font.size = Pt(font_size)
-        p.font.color.rgb = color
-        p.font.bold = bold
-        p.alignment = align
-        return shape
+        return template.format(id=shape_id, num=shape_id - 1,
+                               x=left, y=top, cx=width, cy=height, **fields)
+    
+    @staticmethod
+    def text_box_xml(shape_id: int, box: BoundingBox, text: str, font_size: float,
+                     color, bold: bool = False, align=ALIGN_LEFT) -> str:
+        """align 可以是 PP_ALIGN 成员或其 XML 值"""
+        paragraph = _paragraph_xml(text, _centipoints(font_size), str(color),
+                                   attrs=f' algn="{getattr(align, "xml_value", align)}"',
+                                   bold=' b="1"' if bold else ' b="0"')
+        return ShapeFactory._sp_xml(_TEXTBOX_XML, shape_id, box, paragraphs=paragraph)
     
     @staticmethod
-    def create_bullet_list(slide, box: BoundingBox, items: List[Dict],
+    def bullet_list_xml(shape_id: int, box: BoundingBox, items: List[Tuple[str, int]],
+                        font_size: float, color) -> str:
+        """items 为 _normalize_points 的结果：(text, level) 元组"""
+        sz, color = _centipoints(font_size), str(color)
+        paragraphs = []
+        for text, level in items:
+            if not isinstance(level, int) or not 0 <= level <= 8:
+                raise ValueError(f"paragraph level must be int in 0..8, got {level!r}")
+            attrs = f' lvl="{level}"' if level else ''
+            paragraphs.append(_paragraph_xml(text, sz, color, attrs=attrs))
+        return ShapeFactory._sp_xml(_TEXTBOX_XML, shape_id, box, paragraphs=''.join(paragraphs))
+    
+    @staticmethod
+    def rectangle_xml(shape_id: int, box: BoundingBox, color) -> str:
+        return ShapeFactory._sp_xml(_RECTANGLE_XML, shape_id, box, color=str(color))
+    
+    @staticmethod
+    def insert(slide, sp_xml: str):
+        _lazy()
+        sp = parse_xml(sp_xml)
+        slide.shapes._spTree.insert_element_before(sp, 'p:extLst')
+        return slide.shapes._shape_factory(sp)
+    
+    @staticmethod
+    def create_text_box(slide, box: BoundingBox, text: str, font_size: float,
+                        color, bold: bool = False, align=ALIGN_LEFT):
+        return ShapeFactory.insert(slide, ShapeFactory.text_box_xml(
+            slide.shapes._next_shape_id, box, text, font_size, color, bold, align))
+    
+    @staticmethod
+    def create_bullet_list(slide, box: BoundingBox, items: List[Tuple[str, int]],
                            font_size: float, color):
-        left, top, width, height = box.to_emu()
-        shape = slide.shapes.add_textbox(Emu(left), Emu(top), Emu(width), Emu(height))
-        tf = shape.text_frame
-        tf.word_wrap = True
-        for i, item in enumerate(items):
-            text = item.get('text', '') if isinstance(item, dict) else str(item)
-            level = item.get('level', 0) if isinstance(item, dict) else 0
-            p = tf.paragraphs[0] if i == 0 else tf.add_paragraph()
-            p.text = text
-            p.font.size = Pt(font_size)
-            p.font.color.rgb = color
-            p.level = level
-            p.bullet = True
-        return shape
+        return ShapeFactory.insert(slide, ShapeFactory.bullet_list_xml(
+            slide.shapes._next_shape_id, box, items, font_size, color))
     
     @staticmethod
     def create_rectangle(slide, box: BoundingBox, color):
-        left, top, width, height = box.to_emu()
-        shape = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Emu(left), Emu(top), Emu(width), Emu(height))
-        shape.fill.solid()
-        shape.fill.fore_color.rgb = color
-        shape.line.fill.background()
-        return shape
+        return ShapeFactory.insert(slide, ShapeFactory.rectangle_xml(
+            slide.shapes._next_shape_id, box, color))
+
+
+POINT_FIELDS = ('body_points', 'left_column', 'right_column')
+
+
+def _normalize_points(points: List) -> List[Tuple[str, int]]:
+    """要点统一为 (text, level)：dict 取 text/level，其余按纯文本、0 级处理"""
+    return [(p.get('text', ''), p.get('level', 0)) if isinstance(p, dict) else (str(p), 0)
+            for p in points]
+
+
+def normalize_slide(data: Dict) -> Dict:
+    """返回要点字段已规范化的浅拷贝；build_shapes / render 只接受规范化后的数据"""
+    normalized = dict(data)
+    for key in POINT_FIELDS:
+        points = data.get(key)
+        if points:
+            normalized[key] = _normalize_points(points)
+    return normalized
+
+
+def _build_layouts(width: float, margin: float) -> Mapping[str, Mapping[str, BoundingBox]]:
+    """各页型的版式框（只读，类定义时构建一次）"""
+    w = width - 2 * margin
+    layouts = {
+        'title': {'title': BoundingBox(margin, 2.5, w, 1.5),
+                 'content': BoundingBox(margin, 4.2, w, 1.0)},
+        'content': {'title': BoundingBox(margin, 0.4, w, 0.8),
+                   'content': BoundingBox(margin, 1.4, w, 5.5)},
+        'two_column': {'title': BoundingBox(margin, 0.4, w, 0.8),
+                      'left': BoundingBox(margin, 1.4, w/2-0.2, 5.5),
+                      'right': BoundingBox(margin+w/2+0.2, 1.4, w/2-0.2, 5.5)},
+        'closing': {'title': BoundingBox(margin, 2.5, w, 1.5),
+                   'content': BoundingBox(margin, 4.2, w, 1.0)},
+    }
+    return MappingProxyType({k: MappingProxyType(v) for k, v in layouts.items()})
 
 
 class SlideRenderer:
     """幻灯片渲染器"""
     
     WIDTH, HEIGHT, MARGIN = 13.333, 7.5, 0.5
+    _LAYOUTS = _build_layouts(WIDTH, MARGIN)
+    _HEADER_BOX = BoundingBox(0, 0, WIDTH, 2.2)
+    
+    # 所有渲染器共用一个溢出引擎，fit_text 的缓存可跨任务复用
+    _OVERFLOW = TextOverflowEngine()
     
     def __init__(self, theme: ThemeColorScheme):
         self.theme = theme
-        self.overflow = TextOverflowEngine()
+        self.overflow = self._OVERFLOW
     
-    def get_layout(self, slide_type: str) -> Dict[str, BoundingBox]:
-        w = self.WIDTH - 2 * self.MARGIN
-        layouts = {
-            'title': {'title': BoundingBox(self.MARGIN, 2.5, w, 1.5),
-                     'content': BoundingBox(self.MARGIN, 4.2, w, 1.0)},
-            'content': {'title': BoundingBox(self.MARGIN, 0.4, w, 0.8),
-                       'content': BoundingBox(self.MARGIN, 1.4, w, 5.5)},
-            'two_column': {'title': BoundingBox(self.MARGIN, 0.4, w, 0.8),
-                          'left': BoundingBox(self.MARGIN, 1.4, w/2-0.2, 5.5),
-                          'right': BoundingBox(self.MARGIN+w/2+0.2, 1.4, w/2-0.2, 5.5)},
-            'closing': {'title': BoundingBox(self.MARGIN, 2.5, w, 1.5),
-                       'content': BoundingBox(self.MARGIN, 4.2, w, 1.0)},
-        }
-        return layouts.get(slide_type, layouts['content'])
+    def get_layout(self, slide_type: str) -> Mapping[str, BoundingBox]:
+        return self._LAYOUTS.get(slide_type, self._LAYOUTS['content'])
     
-    def render(self, prs: Presentation, data: Dict) -> Any:
-        slide = prs.slides.add_slide(prs.slide_layouts[6])
+    def build_shapes(self, data: Dict, first_id: int = 2,
+                     metrics_inputs: Optional[List[Tuple[str, BoundingBox, float]]] = None) -> List[str]:
+        """生成一页全部形状的 XML（不依赖 python-pptx 对象，可在子进程中执行）
+
+        data 需先经 normalize_slide 处理。first_id 是第一个形状的 id；空白版式的新幻灯片上为 2。
+        传入 metrics_inputs 时顺带追加布局评估用的 (text, box, font_size)。
+        """
+        shapes = []
         slide_type = data.get('slide_type', 'content')
         layout = self.get_layout(slide_type)
         
         if slide_type in ['title', 'closing']:
-            ShapeFactory.create_rectangle(slide, BoundingBox(0, 0, self.WIDTH, 2.2),
-                                         self.theme.get_rgb('primary'))
+            shapes.append(ShapeFactory.rectangle_xml(first_id + len(shapes), self._HEADER_BOX,
+                                                     self.theme.get_rgb('primary')))
         
         title = data.get('title', '')
         if title:
             fs = 36 if slide_type in ['title', 'closing'] else 28
             result = self.overflow.fit_text(title, layout['title'], fs)
             color = self.theme.get_rgb('text_light' if slide_type in ['title', 'closing'] else 'primary')
-            align = PP_ALIGN.CENTER if slide_type in ['title', 'closing'] else PP_ALIGN.LEFT
-            ShapeFactory.create_text_box(slide, layout['title'], result['text'],
-                                        result['font_size'], color, True, align)
+            align = ALIGN_CENTER if slide_type in ['title', 'closing'] else ALIGN_LEFT
+            shapes.append(ShapeFactory.text_box_xml(first_id + len(shapes), layout['title'],
+                                                    result['text'], result['font_size'],
+                                                    color, True, align))
         
         subtitle = data.get('subtitle')
         if subtitle and 'content' in layout:
             result = self.overflow.fit_text(subtitle, layout['content'], 24)
-            ShapeFactory.create_text_box(slide, layout['content'], result['text'],
-                                        result['font_size'], self.theme.get_rgb('text_dark'),
-                                        False, PP_ALIGN.CENTER if slide_type == 'title' else PP_ALIGN.LEFT)
+            shapes.append(ShapeFactory.text_box_xml(first_id + len(shapes), layout['content'],
+                                                    result['text'], result['font_size'],
+                                                    self.theme.get_rgb('text_dark'), False,
+                                                    ALIGN_CENTER if slide_type == 'title' else ALIGN_LEFT))
         
-        points = data.get('body_points', [])
+        points = data.get('body_points')
         if points and 'content' in layout:
-            processed = [{'text': p.get('text', '') if isinstance(p, dict) else str(p),
-                         'level': p.get('level', 0) if isinstance(p, dict) else 0}
-                        for p in points]
-            ShapeFactory.create_bullet_list(slide, layout['content'], processed, 18,
-                                           self.theme.get_rgb('text_dark'))
+            shapes.append(ShapeFactory.bullet_list_xml(first_id + len(shapes), layout['content'],
+                                                       points, 18, self.theme.get_rgb('text_dark')))
+        
+        if metrics_inputs is not None:
+            # 评估口径：原始标题按 28pt，正文逐条换行拼接按 18pt
+            if title:
+                metrics_inputs.append((title, layout['title'], 28))
+            if points:
+                metrics_inputs.append(('\n'.join(text for text, _ in points),
+                                       layout.get('content', layout['title']), 18))
         
         if slide_type == 'two_column':
             for col, key in [('left_column', 'left'), ('right_column', 'right')]:
-                items = data.get(col, [])
+                items = data.get(col)
                 if items and key in layout:
-                    processed = [{'text': p.get('text', ''), 'level': p.get('level', 0)}
-                                if isinstance(p, dict) else {'text': str(p), 'level': 0}
-                                for p in items]
-                    ShapeFactory.create_bullet_list(slide, layout[key], processed, 16,
-                                                   self.theme.get_rgb('text_dark'))
+                    shapes.append(ShapeFactory.bullet_list_xml(first_id + len(shapes), layout[key],
+                                                               items, 16, self.theme.get_rgb('text_dark')))
+        
+        return shapes
+    
+    def render(self, prs: 'Presentation', data: Dict,
+               metrics_inputs: Optional[List[Tuple[str, BoundingBox, float]]] = None,
+               shapes: Optional[List[str]] = None) -> Any:
+        """渲染一页（data 需先经 normalize_slide）；shapes 为预先 build_shapes(data) 得到的 XML（如进程池产出），省略时就地构建"""
+        _lazy()
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        if shapes is None:
+            shapes = self.build_shapes(data, slide.shapes._next_shape_id, metrics_inputs)
+        sp_tree = slide.shapes._spTree
+        for sp_xml in shapes:
+            sp_tree.insert_element_before(parse_xml(sp_xml), 'p:extLst')
         
         notes = data.get('speaker_notes')
         if notes:
@@ -129,4 +272,4 @@ class SlideRenderer:
         return slide
 
 
-__all__ = ['ShapeFactory', 'SlideRenderer']
\ No newline at end of file
+__all__ = ['ShapeFactory', 'SlideRenderer', 'normalize_slide']
\ No newline at end of file
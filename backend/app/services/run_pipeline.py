@@ -9,15 +9,20 @@ IMPORTANT: This adapter connects to your teammates' implementations.
 If function signatures differ, update the calls below.
 """
 
+import asyncio
+import logging
 import os
 import time
-import traceback
 from typing import Dict, Any, Optional, Callable
 from pathlib import Path
 
 from ..core.job_store import job_store
 from ..schemas.job_schema import JobStatus
 
+# Failures are logged without a traceback unless DEBUG is enabled for this
+# logger: formatting the stack is much more expensive than the message
+log = logging.getLogger(__name__)
+
 
 # ============================================================
 # ADAPTER CONFIGURATION
@@ -26,19 +31,20 @@ from ..schemas.job_schema import JobStatus
 
 # Try to import LLM service
 try:
-    from .LLMService import generate_presentation
+    from .LLMService import generate_presentation, close_llm_client
     LLM_AVAILABLE = True
 except ImportError as e:
-    print(f"Warning: LLMService not fully available: {e}")
+    log.warning("LLMService not fully available: %s", e)
     LLM_AVAILABLE = False
     generate_presentation = None
+    close_llm_client = None
 
 # Try to import PPTX engine
 try:
     from .engine import generate_pptx, PPTXEngine
     ENGINE_AVAILABLE = True
 except ImportError as e:
-    print(f"Warning: Engine not fully available: {e}")
+    log.warning("Engine not fully available: %s", e)
     ENGINE_AVAILABLE = False
     generate_pptx = None
 
@@ -48,6 +54,55 @@ except ImportError as e:
 # Used when LLM service is unavailable
 # ============================================================
 
+# Prompt-independent slides, shared by every mock deck (treat as read-only)
+_MOCK_SLIDES_STATIC = (
+    {
+        "slide_type": "section", 
+        "title": "Introduction",
+        "subtitle": "Getting Started"
+    },
+    {
+        "slide_type": "content",
+        "title": "Key Points",
+        "body_points": [
+            {"text": "This is an auto-generated presentation", "level": 0, "priority": "high"},
+            {"text": "Created using AI technology", "level": 1, "priority": "normal"},
+            {"text": "Customizable and editable", "level": 1, "priority": "normal"},
+            {"text": "Professional quality output", "level": 0, "priority": "high"}
+        ]
+    },
+    {
+        "slide_type": "two_column",
+        "title": "Comparison",
+        "left_column": [
+            {"text": "Traditional Method", "level": 0},
+            {"text": "Time consuming", "level": 1},
+            {"text": "Manual effort", "level": 1}
+        ],
+        "right_column": [
+            {"text": "AI-Powered Method", "level": 0},
+            {"text": "Fast generation", "level": 1},
+            {"text": "Automated workflow", "level": 1}
+        ]
+    },
+    {
+        "slide_type": "content",
+        "title": "Benefits",
+        "body_points": [
+            {"text": "Save time on presentation creation", "level": 0, "priority": "critical"},
+            {"text": "Consistent formatting and style", "level": 0, "priority": "high"},
+            {"text": "Focus on content, not design", "level": 0, "priority": "high"},
+            {"text": "Easy to iterate and refine", "level": 0, "priority": "normal"}
+        ]
+    },
+    {
+        "slide_type": "closing",
+        "title": "Thank You",
+        "subtitle": "Questions & Discussion"
+    }
+)
+
+
 def get_mock_slidedeck(prompt: str) -> Dict[str, Any]:
     """Generate mock slide data for demo purposes"""
     return {
@@ -62,50 +117,7 @@ def get_mock_slidedeck(prompt: str) -> Dict[str, Any]:
                 "title": "AI-Generated Presentation",
                 "subtitle": f"Based on: {prompt[:80]}..."
             },
-            {
-                "slide_type": "section", 
-                "title": "Introduction",
-                "subtitle": "Getting Started"
-            },
-            {
-                "slide_type": "content",
-                "title": "Key Points",
-                "body_points": [
-                    {"text": "This is an auto-generated presentation", "level": 0, "priority": "high"},
-                    {"text": "Created using AI technology", "level": 1, "priority": "normal"},
-                    {"text": "Customizable and editable", "level": 1, "priority": "normal"},
-                    {"text": "Professional quality output", "level": 0, "priority": "high"}
-                ]
-            },
-            {
-                "slide_type": "two_column",
-                "title": "Comparison",
-                "left_column": [
-                    {"text": "Traditional Method", "level": 0},
-                    {"text": "Time consuming", "level": 1},
-                    {"text": "Manual effort", "level": 1}
-                ],
-                "right_column": [
-                    {"text": "AI-Powered Method", "level": 0},
-                    {"text": "Fast generation", "level": 1},
-                    {"text": "Automated workflow", "level": 1}
-                ]
-            },
-            {
-                "slide_type": "content",
-                "title": "Benefits",
-                "body_points": [
-                    {"text": "Save time on presentation creation", "level": 0, "priority": "critical"},
-                    {"text": "Consistent formatting and style", "level": 0, "priority": "high"},
-                    {"text": "Focus on content, not design", "level": 0, "priority": "high"},
-                    {"text": "Easy to iterate and refine", "level": 0, "priority": "normal"}
-                ]
-            },
-            {
-                "slide_type": "closing",
-                "title": "Thank You",
-                "subtitle": "Questions & Discussion"
-            }
+            *_MOCK_SLIDES_STATIC
         ]
     }
 
@@ -135,9 +147,6 @@ class PipelineRunner:
         self.template_id = template_id
         self.output_dir = Path(output_dir)
         
-        # Ensure output directory exists
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-        
         # Timing
         self.generation_time: Optional[float] = None
         self.render_time: Optional[float] = None
@@ -146,7 +155,7 @@ class PipelineRunner:
         """Update job status in store"""
         job_store.set_status(self.job_id, status, progress, error)
     
-    def _generate_slides(self) -> Dict[str, Any]:
+    async def _generate_slides(self) -> Dict[str, Any]:
         """
         Step 1: Generate slide JSON from prompt
         
@@ -160,9 +169,9 @@ class PipelineRunner:
         if LLM_AVAILABLE and generate_presentation:
             try:
                 # Call your teammate's LLM service
-                # Expected signature: generate_presentation(user_request, content_text=None)
+                # Expected signature: async generate_presentation(user_request, content_text=None)
                 # Returns: {"metadata": {...}, "slides": [...]}
-                slidedeck = generate_presentation(self.prompt)
+                slidedeck = await generate_presentation(self.prompt)
                 
                 # Validate we got slides
                 if not slidedeck or 'slides' not in slidedeck:
@@ -173,16 +182,50 @@ class PipelineRunner:
                 return slidedeck
                 
             except Exception as e:
-                print(f"LLM generation failed, using mock data: {e}")
-                traceback.print_exc()
+                log.warning("LLM generation failed, using mock data: %s", e,
+                            exc_info=log.isEnabledFor(logging.DEBUG))
         
         # Fallback to mock data
-        print("Using mock slidedeck data for demo")
+        log.warning("Using mock slidedeck data for demo")
         slidedeck = get_mock_slidedeck(self.prompt)
         self.generation_time = time.time() - start
         self._update_status(JobStatus.GENERATING_JSON, 0.5)
         return slidedeck
     
+    def _prepare_render_env(self) -> None:
+        """
+        Prepare everything rendering needs that does not depend on the slides.
+        Runs in a worker thread while the LLM call is in flight.
+        """
+        # Ensure output directory exists
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        if ENGINE_AVAILABLE:
+            # Build the cached slide template and the theme table and compile
+            # the text-fit kernels once, so the first render does not pay for it
+            from .engine import _template_bytes
+            from .overflow import warmup
+            from .renderer import SlideRenderer
+            from .themes import get_theme, list_themes
+            _template_bytes(SlideRenderer.WIDTH, SlideRenderer.HEIGHT)
+            warmup()
+            for name in list_themes():
+                get_theme(name).get_rgb('primary')
+    
+    async def _generate_and_prepare(self) -> Dict[str, Any]:
+        """Overlap slide generation (network-bound) with render setup"""
+        try:
+            slidedeck, _ = await asyncio.gather(
+                self._generate_slides(),
+                asyncio.to_thread(self._prepare_render_env)
+            )
+        finally:
+            # The OpenAI client is bound to this asyncio.run loop; release
+            # its connections before the loop is closed
+            if close_llm_client:
+                await close_llm_client()
+        return slidedeck
+    
     def _render_pptx(self, slidedeck: Dict[str, Any]) -> str:
         """
         Step 2: Render PPTX from slide JSON
@@ -215,8 +258,8 @@ class PipelineRunner:
                 return output_path
                 
             except Exception as e:
-                print(f"PPTX rendering failed: {e}")
-                traceback.print_exc()
+                # Re-raised to run(), which reports the failure
+                log.error("PPTX rendering failed: %s", e)
                 raise
         else:
             raise RuntimeError("PPTX Engine not available")
@@ -245,8 +288,8 @@ class PipelineRunner:
         Returns True if successful, False if failed.
         """
         try:
-            # Step 1: Generate slides JSON
-            slidedeck = self._generate_slides()
+            # Step 1: Generate slides JSON (render setup runs alongside)
+            slidedeck = asyncio.run(self._generate_and_prepare())
             
             # Step 2: Render PPTX
             output_path = self._render_pptx(slidedeck)
@@ -267,8 +310,8 @@ class PipelineRunner:
             
         except Exception as e:
             error_msg = f"{type(e).__name__}: {str(e)}"
-            print(f"Pipeline failed for job {self.job_id}: {error_msg}")
-            traceback.print_exc()
+            log.error("Pipeline failed for job %s: %s", self.job_id, error_msg,
+                      exc_info=log.isEnabledFor(logging.DEBUG))
             job_store.set_failed(self.job_id, error_msg)
             return False
 
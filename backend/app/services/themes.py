@@ -1,8 +1,11 @@
 """主题配色系统"""
 
-from dataclasses import dataclass
-from typing import Dict, List
-from pptx.dml.color import RGBColor
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional
+
+if TYPE_CHECKING:
+    from pptx.dml.color import RGBColor
 
 
 @dataclass
@@ -15,17 +18,42 @@ class ThemeColorScheme:
     background: str
     text_dark: str
     text_light: str
+    _rgb: Optional[Dict[str, 'RGBColor']] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # 首次 get_rgb 时一次解析全部颜色（届时才导入 python-pptx），之后只做字典查找
+        self._rgb = None
+    
+    def _build_rgb(self) -> Dict[str, 'RGBColor']:
+        from pptx.dml.color import RGBColor
+        # bytes.fromhex 一次解析 6 位十六进制，比 from_string 的三次 int(..., 16) 快
+        return {f.name: RGBColor(*bytes.fromhex(getattr(self, f.name).lstrip('#')))
+                for f in fields(self) if f.init and f.name != 'name'}
+    
+    def rgb_table(self) -> Mapping[str, 'RGBColor']:
+        """全部颜色的 RGBColor 只读表"""
+        if self._rgb is None:
+            self._rgb = self._build_rgb()
+        return MappingProxyType(self._rgb)
+    
+    def __getstate__(self):
+        # RGBColor 无法 pickle：只传原始字段（如发往渲染进程池），接收端重建缓存
+        state = self.__dict__.copy()
+        state.pop('_rgb', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__post_init__()
     
-    def get_rgb(self, color_name: str) -> RGBColor:
-        hex_color = getattr(self, color_name, self.text_dark).lstrip('#')
-        return RGBColor(
-            int(hex_color[0:2], 16),
-            int(hex_color[2:4], 16),
-            int(hex_color[4:6], 16)
-        )
+    def get_rgb(self, color_name: str) -> 'RGBColor':
+        if self._rgb is None:
+            self._rgb = self._build_rgb()
+        rgb = self._rgb.get(color_name)
+        return rgb if rgb is not None else self._rgb['text_dark']
 
 
-COLOR_SCHEMES: Dict[str, ThemeColorScheme] = {
+COLOR_SCHEMES: Mapping[str, ThemeColorScheme] = MappingProxyType({
     'corporate_blue': ThemeColorScheme(
         name='Corporate Blue',
         primary='#1E3A5F',
@@ -71,7 +99,7 @@ COLOR_SCHEMES: Dict[str, ThemeColorScheme] = {
         text_dark='#263238',
         text_light='#FFFFFF'
     ),
-}
+})
 
 
 def get_theme(theme_name: str) -> ThemeColorScheme:
@@ -84,4 +112,21 @@ def list_themes() -> List[str]:
     return list(COLOR_SCHEMES.keys())
 
 
-__all__ = ['ThemeColorScheme', 'COLOR_SCHEMES', 'get_theme', 'list_themes']
\ No newline at end of file
+# 主题名 -> 颜色名 -> RGBColor；首次使用时对全部主题构建一次（与 python-pptx 一样延迟加载）
+_THEME_RGB: Optional[Mapping[str, Mapping[str, 'RGBColor']]] = None
+
+
+def get_theme_rgb(theme_name: str, color_name: str) -> 'RGBColor':
+    """按主题名直接取颜色的快速路径；未知颜色名同 get_rgb 回退到 text_dark"""
+    global _THEME_RGB
+    if _THEME_RGB is None:
+        _THEME_RGB = MappingProxyType({key: theme.rgb_table()
+                                       for key, theme in COLOR_SCHEMES.items()})
+    colors = _THEME_RGB.get(theme_name)
+    if colors is None:
+        raise KeyError(f"Theme '{theme_name}' not found")
+    rgb = colors.get(color_name)
+    return rgb if rgb is not None else colors['text_dark']
+
+
+__all__ = ['ThemeColorScheme', 'COLOR_SCHEMES', 'get_theme', 'list_themes', 'get_theme_rgb']
\ No newline at end of file
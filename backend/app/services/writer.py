@@ -0,0 +1,170 @@
+"""流式 PPTX 写出：不构建 python-pptx 对象树，逐页把形状 XML 写入 zip"""
+
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from .renderer import _NSDECLS
+
+_SLIDE_CT = 'application/vnd.openxmlformats-officedocument.presentationml.slide+xml'
+_SLIDE_RT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide'
+_LAYOUT_RT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideLayout'
+_XML_DECL = b"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+
+# 与 python-pptx 在空白版式上 add_slide 生成的幻灯片结构一致
+_SLIDE_HEAD = _XML_DECL + (
+    '<p:sld %s xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+    '<p:grpSpPr/>' % _NSDECLS).encode()
+_SLIDE_TAIL = b'</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>'
+_SLIDE_RELS = _XML_DECL + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="%s" Target="../slideLayouts/{layout}"/></Relationships>'
+    % _LAYOUT_RT).encode()
+
+# 形状片段自带命名空间声明（便于单独解析）；写入整页时由根元素统一声明
+_SP_OPEN = f'<p:sp {_NSDECLS}>'
+
+_RID_RE = re.compile(rb'Id="rId(\d+)"')
+
+# 被改写的三个部件，其余部件原样复制
+_REWRITTEN = ('[Content_Types].xml', 'ppt/presentation.xml', 'ppt/_rels/presentation.xml.rels')
+
+
+@dataclass(frozen=True)
+class _Skeleton:
+    """模板拆解结果：需插入幻灯片条目处切为 (前段, 后段)"""
+    parts: Tuple[Tuple[zipfile.ZipInfo, bytes], ...]
+    content_types: Tuple[bytes, bytes]
+    presentation: Tuple[bytes, bytes]
+    rels: Tuple[bytes, bytes]
+    first_rid: int
+    slide_rels: bytes
+
+
+@lru_cache(maxsize=4)
+def _skeleton(template: bytes, layout_index: int) -> _Skeleton:
+    from pptx import Presentation
+    from pptx.opc.oxml import serialize_part_xml
+
+    prs = Presentation(io.BytesIO(template))
+    if len(prs.slides):
+        raise ValueError("streaming template must not contain slides")
+    layout = prs.slide_layouts[layout_index].part.partname.rsplit('/', 1)[1]
+
+    # 按 schema 顺序补一个空 sldIdLst，作为插入点
+    prs_elm = prs.part._element
+    prs_elm.get_or_add_sldIdLst()
+    presentation = serialize_part_xml(prs_elm)
+
+    with zipfile.ZipFile(io.BytesIO(template)) as zf:
+        parts = tuple((info, zf.read(info)) for info in zf.infolist()
+                      if info.filename not in _REWRITTEN)
+        content_types = zf.read('[Content_Types].xml')
+        rels = zf.read('ppt/_rels/presentation.xml.rels')
+
+    def split(blob: bytes, marker: bytes) -> Tuple[bytes, bytes]:
+        head, sep, tail = blob.rpartition(marker)
+        if not sep:
+            raise ValueError(f"template part has no {marker!r}")
+        return head, sep + tail
+
+    before, _, after = presentation.partition(b'<p:sldIdLst/>')
+    return _Skeleton(
+        parts=parts,
+        content_types=split(content_types, b'</Types>'),
+        presentation=(before + b'<p:sldIdLst>', b'</p:sldIdLst>' + after),
+        rels=split(rels, b'</Relationships>'),
+        first_rid=max(map(int, _RID_RE.findall(rels)), default=0) + 1,
+        slide_rels=_SLIDE_RELS.replace(b'{layout}', layout.encode()),
+    )
+
+
+class StreamingPPTXWriter:
+    """按页写出 .pptx：先写模板部件与幻灯片清单，之后每页生成即写入
+
+    页数需预先给定（[Content_Types].xml 等清单写在最前，与 python-pptx 的布局一致）。
+    只支持形状（不含备注页），模板须为不含幻灯片的空白演示文稿。
+
+    background=True 时各页的压缩写入在单个后台线程中按提交顺序执行：zlib 压缩期间
+    释放 GIL，调用方可同时构建下一页的形状。单核机器上没有可重叠的算力，默认关闭。
+    """
+
+    def __init__(self, path: str, template: bytes, num_slides: int, layout_index: int = 6,
+                 background: Optional[bool] = None):
+        self._skeleton = _skeleton(template, layout_index)
+        self._num_slides = num_slides
+        self._written = 0
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        try:
+            self._write_package()
+        except BaseException:
+            self._zip.close()
+            raise
+        if background is None:
+            background = (os.cpu_count() or 1) > 1
+        self._io = (ThreadPoolExecutor(max_workers=1, thread_name_prefix='pptx-writer')
+                    if background else None)
+        self._pending: List[Future] = []
+
+    def _write_package(self) -> None:
+        sk, n, rid = self._skeleton, self._num_slides, self._skeleton.first_rid
+        self._zip.writestr('[Content_Types].xml', sk.content_types[0] + b''.join(
+            f'<Override PartName="/ppt/slides/slide{i}.xml" ContentType="{_SLIDE_CT}"/>'.encode()
+            for i in range(1, n + 1)) + sk.content_types[1])
+        self._zip.writestr('ppt/presentation.xml', sk.presentation[0] + b''.join(
+            f'<p:sldId id="{255 + i}" r:id="rId{rid + i - 1}"/>'.encode()
+            for i in range(1, n + 1)) + sk.presentation[1])
+        self._zip.writestr('ppt/_rels/presentation.xml.rels', sk.rels[0] + b''.join(
+            f'<Relationship Id="rId{rid + i - 1}" Type="{_SLIDE_RT}" Target="slides/slide{i}.xml"/>'.encode()
+            for i in range(1, n + 1)) + sk.rels[1])
+        for info, data in sk.parts:
+            self._zip.writestr(info, data, zipfile.ZIP_DEFLATED)
+
+    def add_slide(self, shapes: List[str]) -> None:
+        """写入一页；shapes 为 SlideRenderer.build_shapes 的结果"""
+        if self._written >= self._num_slides:
+            raise ValueError(f"deck declared {self._num_slides} slides")
+        self._written += 1
+        if self._io is None:
+            self._write_slide(self._written, shapes)
+        else:
+            self._pending.append(self._io.submit(self._write_slide, self._written, shapes))
+
+    def _write_slide(self, index: int, shapes: List[str]) -> None:
+        body = ''.join(sp.replace(_SP_OPEN, '<p:sp>', 1) for sp in shapes)
+        self._zip.writestr(f'ppt/slides/slide{index}.xml',
+                           _SLIDE_HEAD + body.encode() + _SLIDE_TAIL)
+        self._zip.writestr(f'ppt/slides/_rels/slide{index}.xml.rels',
+                           self._skeleton.slide_rels)
+
+    def close(self) -> None:
+        if self._io is not None:
+            self._io.shutdown(wait=True)
+        try:
+            for future in self._pending:
+                future.result()
+        finally:
+            self._zip.close()
+        if self._written != self._num_slides:
+            raise ValueError(f"deck declared {self._num_slides} slides, "
+                             f"{self._written} written")
+
+    def __enter__(self) -> 'StreamingPPTXWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            if self._io is not None:
+                self._io.shutdown(wait=True, cancel_futures=True)
+            self._zip.close()
+
+
+__all__ = ['StreamingPPTXWriter']
@@ -5,6 +5,11 @@ import json
 from typing import Dict, Any
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def ensure_directory(path: str) -> None:
     directory = os.path.dirname(path)
@@ -18,12 +23,20 @@ def generate_output_filename(base_name: str = "presentation") -> str:
 
 
 def load_json_file(path: str) -> Dict[str, Any]:
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 
 def save_json_file(data: Dict[str, Any], path: str) -> None:
     ensure_directory(path)
+    if orjson is not None:
+        # orjson 直接输出 UTF-8 字节，非 ASCII 字符不转义
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
     with open(path, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
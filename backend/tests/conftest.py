@@ -0,0 +1,12 @@
+"""Shared test setup"""
+
+import os
+import sys
+from pathlib import Path
+
+# The module-level job_store must not write to the working directory
+os.environ.setdefault("JOBSTORE_PERSIST", "0")
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
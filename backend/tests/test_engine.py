@@ -0,0 +1,57 @@
+"""Render pool: pooled slide building must produce the same deck as serial rendering"""
+
+import zipfile
+
+import pytest
+from lxml import etree
+
+from app.services import engine
+
+
+def make_deck(count, notes):
+    kinds = ["title", "section", "content", "two_column", "closing"]
+    return {"slides": [{
+        "slide_type": kinds[i % len(kinds)],
+        "title": f"Slide {i} title " * (1 + i % 3),
+        "subtitle": "subtitle " * (i % 4),
+        "body_points": [{"text": f"point {j} with several words " * (1 + j), "level": j % 3}
+                        for j in range(5)],
+        "left_column": ["left a", "left b"],
+        "right_column": ["right a", "right b", "right c"],
+        "speaker_notes": f"notes {i}" if notes and i % 2 else None,
+    } for i in range(count)]}
+
+
+def slide_parts(path):
+    """Canonical XML of every slide and notes part, keyed by part name"""
+    with zipfile.ZipFile(path) as zf:
+        return {name: etree.tostring(etree.fromstring(zf.read(name)), method="c14n")
+                for name in sorted(zf.namelist())
+                if name.startswith(("ppt/slides/", "ppt/notesSlides/")) and name.endswith(".xml")}
+
+
+@pytest.fixture
+def pooled(monkeypatch):
+    monkeypatch.setattr(engine, "RENDER_WORKERS", 2)
+    monkeypatch.setattr(engine, "PARALLEL_MIN_SLIDES", 2)
+    yield
+    engine.shutdown_render_pool()
+
+
+@pytest.mark.parametrize("count, notes", [(20, True), (60, False)], ids=["pptx", "streaming"])
+def test_pooled_output_matches_serial(tmp_path, monkeypatch, pooled, count, notes):
+    deck = make_deck(count, notes)
+    pptx_engine = engine.PPTXEngine("tech_dark")
+
+    pooled_result = pptx_engine.generate(deck, str(tmp_path / "pooled.pptx"))
+    assert pooled_result["success"], pooled_result.get("error_message")
+    assert engine._render_pool is not None
+
+    monkeypatch.setattr(engine, "RENDER_WORKERS", 1)
+    serial_result = pptx_engine.generate(deck, str(tmp_path / "serial.pptx"))
+    assert serial_result["success"], serial_result.get("error_message")
+
+    assert pooled_result["metrics"] == serial_result["metrics"]
+    pooled_parts = slide_parts(tmp_path / "pooled.pptx")
+    assert len([n for n in pooled_parts if n.startswith("ppt/slides/")]) == count
+    assert pooled_parts == slide_parts(tmp_path / "serial.pptx")
@@ -0,0 +1,179 @@
+"""Job store persistence: log replay, tombstones, compaction, legacy import"""
+
+import importlib
+
+import orjson
+import pytest
+
+from app.core.job_store import JobStore
+from app.schemas.job_schema import JobStatus
+
+job_store_module = importlib.import_module("app.core.job_store")
+
+
+def open_store(data_dir) -> JobStore:
+    return JobStore(str(data_dir), persist=True)
+
+
+def crash(store: JobStore):
+    """Write queued entries and drop the store without compacting"""
+    store.flush()
+    store._log.close()
+
+
+def log_lines(data_dir):
+    return (data_dir / "jobs.log").read_bytes().splitlines(keepends=True)
+
+
+def test_log_replay_restores_latest_entry(tmp_path):
+    store = open_store(tmp_path)
+    store.create_job("job_a", "prompt a")
+    store.flush()
+    store.set_result("job_a", output_path=str(tmp_path / "a.pptx"), num_slides=3)
+    crash(store)
+    assert len(log_lines(tmp_path)) == 2
+
+    store = open_store(tmp_path)
+    job = store.get_job("job_a")
+    assert job.status == JobStatus.DONE.value
+    assert job.num_slides == 3
+    assert job.prompt == "prompt a"
+
+
+def test_historical_jobs_are_indexed_not_loaded(tmp_path):
+    store = open_store(tmp_path)
+    store.create_job("job_a", "a")
+    crash(store)
+
+    store = open_store(tmp_path)
+    assert "job_a" not in store.list_jobs()
+    assert store.iter_job_ids() == ("job_a",)
+    assert store.get_job("job_a").prompt == "a"
+    # Modifying a historical job moves it into memory
+    store.set_failed("job_a", "boom")
+    assert store.list_jobs()["job_a"].error == "boom"
+
+
+def test_delete_writes_tombstone(tmp_path):
+    store = open_store(tmp_path)
+    store.create_job("job_a", "a")
+    store.create_job("job_b", "b")
+    store.flush()
+    assert store.delete_job("job_a")
+    crash(store)
+
+    store = open_store(tmp_path)
+    assert store.get_job("job_a") is None
+    assert store.iter_job_ids() == ("job_b",)
+    # Deleting a job that was only indexed is persisted too
+    assert store.delete_job("job_b")
+    crash(store)
+    assert open_store(tmp_path).iter_job_ids() == ()
+
+
+def test_compaction_keeps_lazily_indexed_jobs(tmp_path):
+    store = open_store(tmp_path)
+    for job_id in ("job_a", "job_b", "job_c"):
+        store.create_job(job_id, job_id)
+        store.flush()
+    store.set_failed("job_a", "boom")
+    crash(store)
+
+    store = open_store(tmp_path)
+    store.delete_job("job_c")
+    store.create_job("job_d", "d")
+    store.compact()
+    # One upsert per live job, no tombstones
+    entries = [orjson.loads(line) for line in log_lines(tmp_path)]
+    assert sorted(e["job_id"] for e in entries) == ["job_a", "job_b", "job_d"]
+    assert {e["op"] for e in entries} == {"upsert"}
+    # Offsets of indexed jobs were rewritten along with the file
+    store._cache.clear()
+    assert store.get_job("job_a").error == "boom"
+    crash(store)
+
+    store = open_store(tmp_path)
+    assert sorted(store.iter_job_ids()) == ["job_a", "job_b", "job_d"]
+    assert store.get_job("job_b").prompt == "job_b"
+
+
+def test_failed_compaction_requeues_pending_ids(tmp_path, monkeypatch):
+    store = open_store(tmp_path)
+    store.create_job("job_a", "a")
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(job_store_module.os, "replace", fail)
+    store.compact()
+    monkeypatch.undo()
+    assert store._pending_writes == {"job_a"}
+    assert not (tmp_path / "jobs.log.tmp").exists()
+    crash(store)
+    assert open_store(tmp_path).get_job("job_a") is not None
+
+
+def test_imports_legacy_jobs_json(tmp_path):
+    store = JobStore(str(tmp_path), persist=False)
+    job = store.create_job("job_old", "legacy")
+    (tmp_path / "jobs.json").write_bytes(
+        orjson.dumps({"job_old": job.model_dump(mode="json")}))
+
+    store = open_store(tmp_path)
+    assert store.list_jobs()["job_old"].prompt == "legacy"
+    assert store.list_jobs()["job_old"].created_at == job.created_at
+    crash(store)
+    # From now on the log is the source of truth
+    (tmp_path / "jobs.json").unlink()
+    assert open_store(tmp_path).get_job("job_old").prompt == "legacy"
+
+
+def test_torn_final_line_is_truncated(tmp_path):
+    store = open_store(tmp_path)
+    store.create_job("job_a", "a")
+    store.flush()
+    store.create_job("job_b", "b")
+    crash(store)
+    log_path = tmp_path / "jobs.log"
+    data = log_path.read_bytes()
+    log_path.write_bytes(data[:-20])
+
+    store = open_store(tmp_path)
+    assert store.iter_job_ids() == ("job_a",)
+    store.create_job("job_c", "c")
+    crash(store)
+
+    store = open_store(tmp_path)
+    assert sorted(store.iter_job_ids()) == ["job_a", "job_c"]
+    assert store.get_job("job_c").prompt == "c"
+
+
+@pytest.mark.parametrize("bad_line", [b"garbage\n", b'{"op": "upsert"}\n'])
+def test_corrupt_line_does_not_stop_indexing(tmp_path, bad_line):
+    store = open_store(tmp_path)
+    store.create_job("job_a", "a")
+    store.create_job("job_b", "b")
+    crash(store)
+    with open(tmp_path / "jobs.log", "ab") as f:
+        f.write(bad_line)
+
+    store = open_store(tmp_path)
+    store.delete_job("job_a")
+    store.create_job("job_c", "c")
+    crash(store)
+
+    store = open_store(tmp_path)
+    assert sorted(store.iter_job_ids()) == ["job_b", "job_c"]
+    assert store.get_job("job_c").prompt == "c"
+
+
+def test_offset_pointing_at_another_job_is_a_miss(tmp_path):
+    store = open_store(tmp_path)
+    store.create_job("job_a", "a")
+    store.flush()
+    store.create_job("job_b", "b")
+    crash(store)
+
+    store = open_store(tmp_path)
+    store._index["job_b"] = store._index["job_a"]
+    assert store.get_job("job_b") is None
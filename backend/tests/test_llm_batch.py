@@ -0,0 +1,151 @@
+"""Batched slide bodies: one prompt per batch, per-slide fallback for bad entries"""
+
+import asyncio
+import os
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from app.services import LLMService  # noqa: E402
+
+OUTLINE = [
+    {"slide_type": "title", "title": "Blockchain"},
+    {"slide_type": "section", "title": "Basics"},
+    {"slide_type": "content", "title": "How blocks link"},
+    {"slide_type": "two_column", "title": "Pros vs cons"},
+    {"slide_type": "closing", "title": "Summary"},
+]
+
+POINTS = [{"text": f"batched point {i}", "role": "support"} for i in range(4)]
+
+VALID_BATCH = {"slides": [
+    {"idx": 0, "subtitle": "batched opening"},
+    {"idx": 1, "subtitle": "batched section"},
+    {"idx": 2, "body_points": POINTS},
+    {"idx": 3, "left_column": ["batched left"], "right_column": ["batched right"]},
+    {"idx": 4, "subtitle": "batched wrap-up"},
+]}
+
+
+class StubLLM:
+    """Answers call_llm_json by prompt kind and records which kinds were asked"""
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.calls = []
+
+    async def __call__(self, prompt, temperature=0.3, **kwargs):
+        kind, response = self._answer(prompt)
+        self.calls.append(kind)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def _answer(self, prompt):
+        if "Extract presentation intent" in prompt:
+            return "intent", {"presentation_type": "general", "target_audience": "students",
+                              "slide_count": None, "tone": "concise"}
+        if "presentation metadata" in prompt:
+            return "metadata", {"title": "Blockchain", "theme": "tech_dark"}
+        if "planning the structure" in prompt:
+            return "outline", {"outline": OUTLINE}
+        if "several presentation slides" in prompt:
+            return "batch", self.batch
+        if "Generate a subtitle" in prompt:
+            return "subtitle", {"subtitle": "single subtitle"}
+        if "additional body points" in prompt:
+            return "extra_points", {"points": [{"text": "single extra", "role": "support"}]}
+        if "body points" in prompt:
+            return "body_points", {"points": [{"text": f"single point {i}", "role": "main"}
+                                              for i in range(4)]}
+        if "two-column" in prompt:
+            return "two_column", {"left_column": ["single left"], "right_column": ["single right"]}
+        raise AssertionError(f"unexpected prompt: {prompt[:60]!r}")
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    def install(batch):
+        stub = StubLLM(batch)
+        monkeypatch.setattr(LLMService, "call_llm_json", stub)
+        return stub
+    return install
+
+
+def generate(stub):
+    deck = asyncio.run(LLMService.generate_presentation("Explain blockchain"))
+    return deck["slides"], [kind for kind in stub.calls
+                            if kind not in ("intent", "metadata", "outline")]
+
+
+def test_valid_batch_needs_no_per_slide_calls(stub_llm):
+    stub = stub_llm(VALID_BATCH)
+    slides, calls = generate(stub)
+
+    assert calls == ["batch"]
+    assert [s["slide_type"] for s in slides] == [o["slide_type"] for o in OUTLINE]
+    assert slides[0]["subtitle"] == "batched opening"
+    assert slides[1]["subtitle"] == "batched section"
+    assert [p["text"] for p in slides[2]["body_points"]] == [p["text"] for p in POINTS]
+    assert slides[3]["left_column"] == ["batched left"]
+    assert slides[4]["subtitle"] == "batched wrap-up"
+
+
+def test_missing_and_invalid_entries_fall_back_per_slide(stub_llm):
+    stub = stub_llm({"slides": [
+        {"idx": 0, "subtitle": "batched opening"},
+        # idx 1 missing
+        {"idx": 2, "body_points": [{"text": "  ", "role": "main"}]},
+        {"idx": "3", "left_column": ["batched left"], "right_column": ["batched right"]},
+        {"idx": 4, "subtitle": ""},
+        {"idx": 99, "subtitle": "no such slide"},
+        "not an entry",
+    ]})
+    slides, calls = generate(stub)
+
+    assert sorted(calls) == ["batch", "body_points", "subtitle", "subtitle", "two_column"]
+    assert slides[0]["subtitle"] == "batched opening"
+    assert slides[1]["subtitle"] == "single subtitle"
+    assert slides[2]["body_points"][0]["text"] == "single point 0"
+    assert slides[3]["left_column"] == ["single left"]
+    assert slides[4]["subtitle"] == "single subtitle"
+
+
+def test_unparseable_batch_falls_back_for_every_slide(stub_llm):
+    stub = stub_llm(ValueError("batch reply is not JSON"))
+    slides, calls = generate(stub)
+
+    assert sorted(calls) == ["batch", "body_points", "subtitle", "subtitle", "subtitle",
+                             "two_column"]
+    assert len(slides) == len(OUTLINE)
+    assert slides[0]["subtitle"] == "single subtitle"
+    assert slides[3]["right_column"] == ["single right"]
+
+
+def test_large_outline_is_split_into_batches(stub_llm, monkeypatch):
+    monkeypatch.setattr(LLMService, "MAX_BATCH_SLIDES", 2)
+    stub = stub_llm({"slides": [{"idx": i, "subtitle": f"s{i}"} for i in range(5)]})
+    outline = [("section", f"Part {i}") for i in range(5)]
+
+    bodies = asyncio.run(LLMService.generate_all_slide_bodies(outline, None, "concise"))
+
+    assert stub.calls == ["batch"] * 3
+    assert sorted(bodies) == list(range(5))
+
+
+@pytest.mark.parametrize("slide_type, entry, expected", [
+    ("title", {"subtitle": "ok"}, {"subtitle": "ok"}),
+    ("closing", {"subtitle": 3}, None),
+    ("content", {"body_points": POINTS}, {"body_points": POINTS}),
+    ("content", {"body_points": []}, None),
+    ("content", {"body_points": [{"role": "main"}]}, None),
+    ("two_column", {"left_column": ["a"], "right_column": ["b"]},
+     {"left_column": ["a"], "right_column": ["b"]}),
+    ("two_column", {"left_column": ["a"], "right_column": "b"}, None),
+    ("two_column", {"left_column": ["a"]}, None),
+    ("section", None, None),
+    ("unknown", {"subtitle": "ok"}, None),
+])
+def test_validate_batched_body(slide_type, entry, expected):
+    assert LLMService.validate_batched_body(slide_type, entry) == expected
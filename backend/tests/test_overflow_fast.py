@@ -0,0 +1,64 @@
+"""Numba text-fit kernels must agree with the pure Python wrap simulation"""
+
+import random
+
+import pytest
+
+pytest.importorskip("numba")
+
+from app.services import overflow  # noqa: E402
+from app.services.overflow import FontMetrics, TextHeightEstimator  # noqa: E402
+from app.services.overflow_fast import text_codepoints, wrap_line_count  # noqa: E402
+
+WORDS = ["a", "ledger", "distributed", "WWW", "iii", "区块链", "技术", "of", "the",
+         "MMMM", "ok.", "end!", "naïve", "—", "x" * 40]
+
+EDGE_TEXTS = ["", " ", "  ", "\n", "\n\n", "word", " leading", "trailing ", "two  spaces",
+              "line\n", "\nline", "a\n\nb", "区块链技术区块链技术区块链技术", "x" * 200]
+
+
+def random_texts(count, seed):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 60)))
+        if rng.random() < 0.3:
+            text = text.replace(" the ", "\n", 2)
+        if rng.random() < 0.1:
+            text = text.replace(" of ", "  ", 1)
+        texts.append(text)
+    return texts
+
+
+def kernel_lines(text, font_size, width):
+    widths = FontMetrics.CHAR_WIDTH
+    return wrap_line_count(text_codepoints(text), overflow._ASCII_WIDTH_TABLE,
+                           widths["normal"], widths["cjk"], widths["space"],
+                           font_size / 72, width)
+
+
+@pytest.mark.parametrize("font_size", [10.0, 18.0, 36.0])
+@pytest.mark.parametrize("width", [0.5, 2.0, 6.5, 12.0])
+def test_wrap_line_count_matches_simulate_wrap(font_size, width):
+    for text in EDGE_TEXTS + random_texts(300, seed=int(font_size * width)):
+        expected = len(TextHeightEstimator._simulate_wrap(text, font_size, width))
+        assert kernel_lines(text, font_size, width) == expected, (text, font_size, width)
+
+
+def test_font_search_matches_python_search(monkeypatch):
+    rng = random.Random(3)
+    cases = [(text, overflow.BoundingBox(0.5, 1.0, rng.uniform(1, 12), rng.uniform(0.3, 6)),
+              rng.choice([16, 18, 24, 28, 36]))
+             for text in EDGE_TEXTS + random_texts(1000, seed=3)]
+    strategy = overflow.FontReductionStrategy()
+    kernel = [strategy._search(*case) for case in cases]
+
+    monkeypatch.setattr(overflow, "fit_font_size", None)
+    monkeypatch.setattr(overflow, "wrap_line_count", None)
+    overflow._estimate_height.cache_clear()
+    try:
+        python = [strategy._search(*case) for case in cases]
+    finally:
+        overflow._estimate_height.cache_clear()
+
+    assert kernel == python
@@ -0,0 +1,132 @@
+"""Streaming writer: same package as the python-pptx path, slide count enforced"""
+
+import zipfile
+
+import pytest
+from lxml import etree
+from pptx import Presentation
+
+from app.services import engine
+from app.services.renderer import SlideRenderer, normalize_slide
+from app.services.themes import get_theme
+from app.services.writer import StreamingPPTXWriter
+
+NUM_SLIDES = 60
+
+
+def make_deck(count):
+    kinds = ["title", "section", "content", "two_column", "closing"]
+    return {"slides": [{
+        "slide_type": kinds[i % len(kinds)],
+        "title": f"Slide {i} & <escaped> " + "word " * (i % 17),
+        "subtitle": "first line\nsecond line" if i % 3 else "",
+        "body_points": [{"text": "point " * (1 + (i * j) % 30), "level": j % 3}
+                        for j in range(1 + i % 6)] + ["plain string point"],
+        "left_column": ["left a", "left b"],
+        "right_column": [{"text": "right a", "level": 1}],
+    } for i in range(count)]}
+
+
+def package_parts(path):
+    """Every part of the package; XML parts canonicalized
+
+    The order of [Content_Types].xml entries carries no meaning (python-pptx
+    sorts them by part name, the writer lists slides last), so that part is
+    compared as a set.
+    """
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        parts = {}
+        for name in zf.namelist():
+            data = zf.read(name)
+            if name == "[Content_Types].xml":
+                data = frozenset(etree.tostring(entry, method="c14n")
+                                 for entry in etree.fromstring(data))
+            elif name.endswith((".xml", ".rels")):
+                data = etree.tostring(etree.fromstring(data), method="c14n")
+            parts[name] = data
+        return parts
+
+
+@pytest.fixture(scope="module")
+def deck():
+    return make_deck(NUM_SLIDES)
+
+
+@pytest.fixture(scope="module")
+def reference(tmp_path_factory, deck):
+    """The deck written through python-pptx"""
+    path = tmp_path_factory.mktemp("reference") / "deck.pptx"
+    mp = pytest.MonkeyPatch()
+    mp.setattr(engine, "STREAM_MIN_SLIDES", 10 ** 9)
+    mp.setattr(engine, "RENDER_WORKERS", 1)
+    try:
+        result = engine.PPTXEngine("tech_dark").generate(deck, str(path))
+    finally:
+        mp.undo()
+    assert result["success"], result.get("error_message")
+    return path, result
+
+
+def test_engine_streaming_matches_python_pptx(tmp_path, monkeypatch, deck, reference):
+    monkeypatch.setattr(engine, "STREAM_MIN_SLIDES", 1)
+    monkeypatch.setattr(engine, "RENDER_WORKERS", 1)
+    path = tmp_path / "streamed.pptx"
+    result = engine.PPTXEngine("tech_dark").generate(deck, str(path))
+    assert result["success"], result.get("error_message")
+
+    ref_path, ref_result = reference
+    assert result["metrics"] == ref_result["metrics"]
+    assert package_parts(path) == package_parts(ref_path)
+
+    streamed, expected = Presentation(str(path)), Presentation(str(ref_path))
+    assert len(streamed.slides) == NUM_SLIDES
+    assert streamed.slide_width == expected.slide_width
+    for got, want in zip(streamed.slides, expected.slides):
+        assert got.slide_id == want.slide_id
+        assert got.slide_layout.name == want.slide_layout.name
+        assert len(got.shapes) == len(want.shapes)
+
+
+def open_writer(path, num_slides, background=False):
+    template = engine._template_bytes(SlideRenderer.WIDTH, SlideRenderer.HEIGHT)
+    return StreamingPPTXWriter(str(path), template, num_slides, background=background)
+
+
+def write_streamed(path, slides, background):
+    renderer = SlideRenderer(get_theme("tech_dark"))
+    writer = open_writer(path, len(slides), background)
+    for slide in slides:
+        writer.add_slide(renderer.build_shapes(normalize_slide(slide)))
+    writer.close()
+
+
+@pytest.mark.parametrize("background", [False, True], ids=["inline", "background"])
+def test_writer_matches_python_pptx(tmp_path, deck, reference, background):
+    path = tmp_path / "streamed.pptx"
+    write_streamed(path, deck["slides"], background)
+
+    assert package_parts(path) == package_parts(reference[0])
+    assert len(Presentation(str(path)).slides) == NUM_SLIDES
+
+
+@pytest.mark.parametrize("background", [False, True], ids=["inline", "background"])
+def test_close_rejects_missing_slides(tmp_path, background):
+    writer = open_writer(tmp_path / "short.pptx", 3, background)
+    writer.add_slide([])
+    with pytest.raises(ValueError, match="declared 3 slides, 1 written"):
+        writer.close()
+
+
+def test_add_slide_rejects_extra_slides(tmp_path):
+    writer = open_writer(tmp_path / "long.pptx", 1)
+    writer.add_slide([])
+    with pytest.raises(ValueError, match="declared 1 slides"):
+        writer.add_slide([])
+    writer.close()
+    assert len(Presentation(str(tmp_path / "long.pptx")).slides) == 1
+
+
+def test_template_with_slides_is_rejected(tmp_path, reference):
+    with pytest.raises(ValueError, match="must not contain slides"):
+        StreamingPPTXWriter(str(tmp_path / "out.pptx"), reference[0].read_bytes(), 1)